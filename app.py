@@ -3,16 +3,21 @@ Streamlit Tournament Management App
 OOP-based tournament management system
 """
 import streamlit as st
-import pandas as pd
-from database import init_db
+from streamlit.errors import StreamlitAPIException
+from typing import List, Optional
+from database import init_db, instrumentation_enabled, begin_query_log, current_query_log
+from models.session import begin_session
 
 # Import models in correct order to avoid circular dependencies
 from models.player import Player
 from models.team import Team
 from models.match import Match, MatchPhase
 from models.tournament import Tournament
-from tournament_types.default_tournament import DefaultTournament
-from tournament_types.round_robin import RoundRobinTournament
+from tournament_types import TOURNAMENT_TYPES, get_tournament_class
+from utils.poules import get_poules_by_tournament
+
+# pandas and the tournament type modules are imported on first use (see
+# benchmarks/startup.py), so views without a table start without them
 
 # Page config
 st.set_page_config(
@@ -24,30 +29,60 @@ st.set_page_config(
 # Initialize database
 init_db()
 
-# Main app
-st.title("🏆 Toernooi Beheer Systeem")
-st.markdown("Tafeltennis & Padel Toernooien")
+# Fresh identity map per rerun: every row is loaded once and shared
+begin_session()
 
-# Navigation tabs at the top
-# Use query params or session state to handle tab switching
-if 'current_tab' not in st.session_state:
-    st.session_state.current_tab = "overview"
+# Opt-in query instrumentation (TOURNAMENT_DEBUG_QUERIES=1): statements of this rerun
+if instrumentation_enabled():
+    begin_query_log()
 
-# If tournament was just created, switch to overview
-if 'created_tournament_id' in st.session_state:
-    st.session_state.current_tab = "overview"
+# Main views; only the selected one is rendered on a rerun
+VIEWS = {"overview": "📋 Toernooien", "new": "➕ Nieuw Toernooi"}
 
-tab_overview, tab_new = st.tabs(["📋 Toernooien", "➕ Nieuw Toernooi"])
+# Match list: entries rendered per page and status filter options
+MATCHES_PER_PAGE = 20
+MATCH_STATUSES = ["Alle", "Nog te spelen", "Gespeeld"]
+MATCH_LIST_MODES = ["Lijst", "Compact", "Raster"]
 
-with tab_new:
+# Views of one tournament
+TOURNAMENT_VIEWS = {
+    "teams": "👥 Teams & Spelers",
+    "standings": "📊 Standen",
+    "matches": "🎯 Matches",
+    "settings": "⚙️ Instellingen",
+}
+
+
+def kept(key: str, options: Optional[list] = None) -> dict:
+    """
+    Widget arguments (key and on_change) that keep a widget's value while it is
+    not rendered: Streamlit drops the state of widgets missing from a run (other
+    view, phase or mode), so every change is copied to the plain session_state
+    dict `kept_values` and restored from it when the widget is created again.
+    A value that is no longer one of `options` is dropped.
+    """
+    values = st.session_state.setdefault("kept_values", {})
+    if key not in st.session_state and key in values:
+        if options is None or values[key] in options:
+            st.session_state[key] = values[key]
+        else:
+            del values[key]
+    return {"key": key, "on_change": _keep_value, "args": (key,)}
+
+
+def _keep_value(key: str):
+    st.session_state.kept_values[key] = st.session_state[key]
+
+
+def render_new_tournament():
+    """Form to create a new tournament"""
     st.subheader("➕ Nieuw Toernooi Aanmaken")
     
     with st.form("create_tournament"):
         tournament_name = st.text_input("Toernooi Naam *")
         sport_type = st.selectbox("Sport Type *", ["Tafeltennis", "Padel"])
         tournament_type_choice = st.selectbox("Toernooi Type *", [
-            ("Default Tournament", "default_tournament"),
-            ("Vriendschappelijk (Round-Robin)", "round_robin")
+            (label, tournament_type) for tournament_type, (label, _) in TOURNAMENT_TYPES.items()
         ], format_func=lambda x: x[0])
         
         team_type_choice = st.selectbox("Team Type *", [
@@ -69,28 +104,18 @@ with tab_new:
                     tournament_type_val = tournament_type_choice[1]
                     team_type_val = team_type_choice[1]
                     
-                    if tournament_type_val == "default_tournament":
-                        tournament = DefaultTournament(
-                            name=tournament_name.strip(),
-                            sport_type=sport_type,
-                            tournament_type="default_tournament",
-                            team_type=team_type_val,
-                            has_consolation=has_consolation
-                        )
-                    else:
-                        tournament = RoundRobinTournament(
-                            name=tournament_name.strip(),
-                            sport_type=sport_type,
-                            tournament_type="round_robin",
-                            team_type=team_type_val,
-                            has_consolation=False
-                        )
+                    tournament = get_tournament_class(tournament_type_val)(
+                        name=tournament_name.strip(),
+                        sport_type=sport_type,
+                        tournament_type=tournament_type_val,
+                        team_type=team_type_val,
+                        has_consolation=has_consolation
+                    )
                     
                     tournament.save()
                     
                     # Store tournament ID to auto-select it and switch tab
                     st.session_state.created_tournament_id = tournament.id
-                    st.session_state.current_tab = "overview"
                     
                     # Success message and auto-refresh
                     st.success(f"✅ Toernooi '{tournament.name}' aangemaakt!")
@@ -105,7 +130,9 @@ with tab_new:
                     with st.expander("🔍 Details"):
                         st.code(traceback.format_exc())
 
-with tab_overview:
+
+def render_overview():
+    """Tournament selector and the selected view of the chosen tournament"""
     st.subheader("📋 Toernooien Overzicht")
     
     tournaments = Tournament.get_all()
@@ -114,427 +141,634 @@ with tab_overview:
         st.info("Nog geen toernooien. Maak er een aan via 'Nieuw Toernooi'.")
     else:
         # Tournament selector - auto-select newly created tournament
-        tournament_options = {f"{t.name} ({t.sport_type})": t for t in tournaments}
-        default_idx = 0
+        tournament_options = {t.id: t for t in tournaments}
         
         if 'created_tournament_id' in st.session_state:
-            # Find index of newly created tournament
-            for idx, (name, t) in enumerate(tournament_options.items()):
-                if t.id == st.session_state.created_tournament_id:
-                    default_idx = idx
-                    break
-            # Clear it after use
-            if 'created_tournament_id' in st.session_state:
-                del st.session_state.created_tournament_id
+            # Select the newly created tournament, then clear it after use
+            st.session_state.setdefault("kept_values", {})["selected_tournament"] = st.session_state.created_tournament_id
+            st.session_state.pop("selected_tournament", None)
+            del st.session_state.created_tournament_id
         
-        selected_tournament_name = st.selectbox(
+        selected_tournament_id = st.selectbox(
             "Selecteer Toernooi",
-            list(tournament_options.keys()),
-            index=default_idx
+            list(tournament_options),
+            format_func=lambda tid: f"{tournament_options[tid].name} ({tournament_options[tid].sport_type})",
+            **kept("selected_tournament", list(tournament_options))
         )
         
-        if selected_tournament_name:
-            tournament = tournament_options[selected_tournament_name]
+        if selected_tournament_id:
+            tournament = tournament_options[selected_tournament_id]
             
-            # Tournament info
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Sport", tournament.sport_type)
-            with col2:
-                st.metric("Team Type", "Enkel" if tournament.team_type == "single" else "Dubbel")
-            with col3:
-                st.metric("Type", "Default" if tournament.tournament_type == "default_tournament" else "Round-Robin")
+            # Only the selected view is rendered (st.tabs would run all of them)
+            view = st.radio(
+                "Weergave",
+                list(TOURNAMENT_VIEWS),
+                format_func=TOURNAMENT_VIEWS.get,
+                horizontal=True,
+                label_visibility="collapsed",
+                **kept(f"view_{tournament.id}", list(TOURNAMENT_VIEWS))
+            )
             
-            # Tabs for different views
-            tab_teams, tab_standings, tab_matches, tab_settings = st.tabs(["👥 Teams & Spelers", "📊 Standen", "🎯 Matches", "⚙️ Instellingen"])
+            if view == "teams":
+                render_teams(tournament)
+            elif view == "standings":
+                render_standings(tournament)
+            elif view == "matches":
+                render_matches(tournament)
+            else:
+                render_settings(tournament)
+
+
+def render_teams(tournament: Tournament):
+    """Players and teams of a tournament"""
+    st.markdown("### Teams & Spelers Beheer")
+    teams = tournament.get_teams()
+    players = Player.get_by_tournament(tournament.id)
+    
+    # Players section
+    st.markdown("#### 👥 Spelers Toevoegen")
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        if players:
+            st.markdown("**Bestaande Spelers:**")
+            import pandas as pd
+            player_df = pd.DataFrame([{"Naam": p.name} for p in players])
+            st.dataframe(player_df, use_container_width=True, hide_index=True)
+        else:
+            st.info("Nog geen spelers toegevoegd")
+    
+    with col2:
+        # Use form to handle both button click and Enter key, and auto-clear input
+        with st.form(key=f"add_player_form_{tournament.id}"):
+            new_player_name = st.text_input(
+                "Nieuwe Speler", 
+                key=f"new_player_input_{tournament.id}",
+                label_visibility="visible"
+            )
             
-            with tab_teams:
-                st.markdown("### Teams & Spelers Beheer")
-                teams = tournament.get_teams()
-                players = Player.get_by_tournament(tournament.id)
-                
-                # Players section
-                st.markdown("#### 👥 Spelers Toevoegen")
-                col1, col2 = st.columns([2, 1])
-                
-                with col1:
-                    if players:
-                        st.markdown("**Bestaande Spelers:**")
-                        player_df = pd.DataFrame([{"Naam": p.name} for p in players])
-                        st.dataframe(player_df, use_container_width=True, hide_index=True)
-                    else:
-                        st.info("Nog geen spelers toegevoegd")
-                
-                with col2:
-                    # Use form to handle both button click and Enter key, and auto-clear input
-                    with st.form(key=f"add_player_form_{tournament.id}"):
-                        new_player_name = st.text_input(
-                            "Nieuwe Speler", 
-                            key=f"new_player_input_{tournament.id}",
-                            label_visibility="visible"
-                        )
-                        
-                        submitted = st.form_submit_button("➕ Toevoegen", use_container_width=True)
-                        
-                        if submitted:
-                            if new_player_name.strip():
-                                try:
-                                    player = Player.create_or_get_in_tournament(tournament.id, new_player_name.strip())
-                                    st.success(f"✅ {player.name} toegevoegd!")
-                                    # Form will auto-clear on rerun
-                                    st.rerun()
-                                except Exception as e:
-                                    st.error(f"❌ Fout: {e}")
-                            else:
-                                st.warning("Voer een naam in")
-                
-                st.markdown("---")
-                
-                # Teams section
-                if not players:
-                    st.warning("⚠️ Voeg eerst spelers toe voordat je teams maakt")
-                elif len(players) < 3 and tournament.tournament_type == "default_tournament":
-                    st.warning(f"⚠️ Minimaal 3 spelers nodig voor toernooi. Huidig: {len(players)}")
+            submitted = st.form_submit_button("➕ Toevoegen", use_container_width=True)
+            
+            if submitted:
+                if new_player_name.strip():
+                    try:
+                        player = Player.create_or_get_in_tournament(tournament.id, new_player_name.strip())
+                        st.success(f"✅ {player.name} toegevoegd!")
+                        # Form will auto-clear on rerun
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Fout: {e}")
                 else:
-                    st.markdown("#### 🏃 Teams")
-                    
-                    if not teams:
-                        st.info("Nog geen teams aangemaakt")
-                        
-                        if tournament.team_type == "single":
-                            # Single: each player is a team
-                            st.markdown("**Enkelspel**: Elke speler wordt automatisch een team")
-                            if len(players) >= 3:
-                                if st.button("🚀 Teams Aanmaken (alle spelers)", type="primary", key=f"create_all_teams_{tournament.id}"):
-                                    try:
-                                        for player in players:
-                                            team = Team(
-                                                tournament_id=tournament.id,
-                                                player1=player
-                                            )
-                                            team.save()
-                                        st.success(f"✅ {len(players)} teams aangemaakt!")
-                                        st.rerun()
-                                    except Exception as e:
-                                        st.error(f"❌ Fout: {e}")
-                            else:
-                                st.error(f"❌ Minimaal 3 spelers nodig, huidig: {len(players)}")
-                        
-                        else:
-                            # Double: need 2 players per team
-                            st.markdown("**Dubbelspel**: Selecteer 2 spelers per team")
-                            
-                            if len(players) < 2:
-                                st.warning("Minimaal 2 spelers nodig voor dubbelspel")
-                            else:
-                                st.markdown("**Nieuwe Team Samenstellen:**")
-                                col1, col2 = st.columns(2)
-                                with col1:
-                                    player1_name = st.selectbox(
-                                        "Speler 1",
-                                        [p.name for p in players],
-                                        key=f"team_p1_{tournament.id}"
-                                    )
-                                with col2:
-                                    available_players = [p.name for p in players if p.name != player1_name]
-                                    player2_name = st.selectbox(
-                                        "Speler 2",
-                                        available_players,
-                                        key=f"team_p2_{tournament.id}"
-                                    )
-                                
-                                if st.button("➕ Team Toevoegen", key=f"add_team_double_{tournament.id}"):
-                                    p1 = Player.find_by_name_in_tournament(tournament.id, player1_name)
-                                    p2 = Player.find_by_name_in_tournament(tournament.id, player2_name)
-                                    if p1 and p2:
-                                        team = Team(
-                                            tournament_id=tournament.id,
-                                            player1=p1,
-                                            player2=p2
-                                        )
-                                        team.save()
-                                        st.success(f"✅ Team '{team.display_name}' toegevoegd!")
-                                        st.rerun()
-                    
-                    if teams:
-                        st.markdown(f"**{len(teams)} teams aangemaakt:**")
-                        team_list = [{"Team": t.display_name, "Type": "Dubbel" if t.is_double else "Enkel"} for t in teams]
-                        st.dataframe(pd.DataFrame(team_list), use_container_width=True, hide_index=True)
-                        
-                        # Generate matches button (only if tournament type supports it)
-                        if tournament.tournament_type == "default_tournament":
-                            if len(teams) >= 3:
-                                matches = tournament.get_matches()
-                                if not matches:
-                                    if st.button("🎯 Poule Matches Genereren", type="primary", key=f"gen_matches_{tournament.id}"):
-                                        try:
-                                            generated = tournament.generate_matches()
-                                            st.success(f"✅ {len(generated)} matches gegenereerd!")
-                                            st.rerun()
-                                        except Exception as e:
-                                            st.error(f"❌ Fout: {e}")
-                                else:
-                                    st.info(f"ℹ️ Er zijn al {len(matches)} matches voor dit toernooi")
+                    st.warning("Voer een naam in")
+    
+    st.markdown("---")
+    
+    # Teams section
+    if not players:
+        st.warning("⚠️ Voeg eerst spelers toe voordat je teams maakt")
+    elif len(players) < 3 and tournament.tournament_type == "default_tournament":
+        st.warning(f"⚠️ Minimaal 3 spelers nodig voor toernooi. Huidig: {len(players)}")
+    else:
+        st.markdown("#### 🏃 Teams")
+        
+        if not teams:
+            st.info("Nog geen teams aangemaakt")
             
-            with tab_standings:
-                st.markdown("### 📊 Standen")
-                matches = tournament.get_matches()
-                
-                if not matches:
-                    st.info("Genereer eerst matches via het 'Teams & Spelers' tabblad")
+            if tournament.team_type == "single":
+                # Single: each player is a team
+                st.markdown("**Enkelspel**: Elke speler wordt automatisch een team")
+                if len(players) >= 3:
+                    if st.button("🚀 Teams Aanmaken (alle spelers)", type="primary", key=f"create_all_teams_{tournament.id}"):
+                        try:
+                            Team.save_many([
+                                Team(tournament_id=tournament.id, player1=player)
+                                for player in players
+                            ])
+                            st.success(f"✅ {len(players)} teams aangemaakt!")
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"❌ Fout: {e}")
                 else:
-                    phase = st.selectbox(
-                        "Selecteer Fase",
-                        ["poule", "knockout", "consolation"] if tournament.tournament_type == "default_tournament" else ["poule"],
-                        key=f"phase_select_{tournament.id}"
-                    )
-                    
-                    standings = tournament.get_standings(phase=phase)
-                    
-                    if phase == "poule" and tournament.tournament_type == "default_tournament":
-                        # Show standings per poule
-                        if not standings.empty and "Poule" in standings.columns:
-                            # Group by poule
-                            poules = standings["Poule"].unique()
-                            poules_sorted = sorted(poules)
-                            
-                            for poule_name in poules_sorted:
-                                poule_data = standings[standings["Poule"] == poule_name].copy()
-                                # Remove Poule column for display
-                                poule_display = poule_data.drop(columns=["Poule"])
-                                
-                                st.markdown(f"#### 📋 Poule {poule_name}")
-                                st.dataframe(poule_display, use_container_width=True, hide_index=True)
-                                st.markdown("---")
-                        elif standings.empty:
-                            st.info("Geen standen beschikbaar voor poule fase")
-                        else:
-                            # Fallback if structure is different
-                            st.dataframe(standings, use_container_width=True)
-                    else:
-                        # For knockout/consolation or round-robin, show all standings
-                        if not standings.empty:
-                            st.dataframe(standings, use_container_width=True)
-                        else:
-                            st.info("Geen standen beschikbaar voor deze fase")
+                    st.error(f"❌ Minimaal 3 spelers nodig, huidig: {len(players)}")
             
-            with tab_matches:
-                st.markdown("### 🎯 Matches Invoeren")
-                matches = tournament.get_matches()
+            else:
+                # Double: need 2 players per team
+                st.markdown("**Dubbelspel**: Selecteer 2 spelers per team")
                 
-                if not matches:
-                    st.info("Genereer eerst matches via het 'Teams & Spelers' tabblad")
+                if len(players) < 2:
+                    st.warning("Minimaal 2 spelers nodig voor dubbelspel")
                 else:
-                    # Filter matches by phase
-                    phase = st.selectbox(
-                        "Selecteer Fase",
-                        ["poule", "knockout", "consolation"] if tournament.tournament_type == "default_tournament" else ["poule"],
-                        key=f"match_phase_{tournament.id}"
-                    )
-                    
-                    phase_matches = [m for m in matches if m.phase.value == phase]
+                    st.markdown("**Nieuwe Team Samenstellen:**")
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        player1_name = st.selectbox(
+                            "Speler 1",
+                            [p.name for p in players],
+                            key=f"team_p1_{tournament.id}"
+                        )
+                    with col2:
+                        available_players = [p.name for p in players if p.name != player1_name]
+                        player2_name = st.selectbox(
+                            "Speler 2",
+                            available_players,
+                            key=f"team_p2_{tournament.id}"
+                        )
                     
-                    if not phase_matches:
-                        st.info(f"Geen matches in fase '{phase}'")
+                    if st.button("➕ Team Toevoegen", key=f"add_team_double_{tournament.id}"):
+                        p1 = Player.find_by_name_in_tournament(tournament.id, player1_name)
+                        p2 = Player.find_by_name_in_tournament(tournament.id, player2_name)
+                        if p1 and p2:
+                            team = Team(
+                                tournament_id=tournament.id,
+                                player1=p1,
+                                player2=p2
+                            )
+                            team.save()
+                            st.success(f"✅ Team '{team.display_name}' toegevoegd!")
+                            st.rerun()
+        
+        if teams:
+            st.markdown(f"**{len(teams)} teams aangemaakt:**")
+            import pandas as pd
+            team_list = [{"Team": t.display_name, "Type": "Dubbel" if t.is_double else "Enkel"} for t in teams]
+            st.dataframe(pd.DataFrame(team_list), use_container_width=True, hide_index=True)
+            
+            # Generate matches button (only if tournament type supports it)
+            if tournament.tournament_type == "default_tournament":
+                if len(teams) >= 3:
+                    matches = tournament.get_matches()
+                    if not matches:
+                        if st.button("🎯 Poule Matches Genereren", type="primary", key=f"gen_matches_{tournament.id}"):
+                            try:
+                                generated = tournament.generate_matches()
+                                st.success(f"✅ {len(generated)} matches gegenereerd!")
+                                st.rerun()
+                            except Exception as e:
+                                st.error(f"❌ Fout: {e}")
                     else:
-                        # Show unplayed matches first
-                        unplayed = [m for m in phase_matches if not m.is_played]
-                        played = [m for m in phase_matches if m.is_played]
-                        
-                        if unplayed:
-                            st.markdown("#### Nog Te Spelen")
-                            for match in unplayed:
-                                # Determine if it's table tennis (needs set scores)
-                                is_table_tennis = tournament.sport_type == "Tafeltennis"
-                                
-                                with st.expander(f"⚪ {match.team1.display_name} vs {match.team2.display_name}"):
-                                    if is_table_tennis:
-                                        # Table tennis: per set scores (e.g., 11-9, 11-7, etc.)
-                                        st.markdown("**Sets invoeren (bijv. 11-9, 11-7, 9-11):**")
-                                        max_sets = 7  # Maximum sets for a match
-                                        
-                                        sets_to_enter = []
-                                        for i in range(max_sets):
-                                            col_set1, col_sep, col_set2 = st.columns([2, 1, 2])
-                                            with col_set1:
-                                                score1 = st.number_input(
-                                                    f"Set {i+1} - {match.team1.display_name}",
-                                                    min_value=0,
-                                                    max_value=20,
-                                                    key=f"set_{match.id}_{i}_1",
-                                                    value=match.sets[i][0] if i < len(match.sets) else 0
-                                                )
-                                            with col_sep:
-                                                st.markdown("**-**")
-                                            with col_set2:
-                                                score2 = st.number_input(
-                                                    f"Set {i+1} - {match.team2.display_name}",
-                                                    min_value=0,
-                                                    max_value=20,
-                                                    key=f"set_{match.id}_{i}_2",
-                                                    value=match.sets[i][1] if i < len(match.sets) else 0
-                                                )
-                                            
-                                            # Only add set if at least one score is > 0
-                                            if score1 > 0 or score2 > 0:
-                                                sets_to_enter.append((score1, score2))
-                                            elif i >= len(match.sets):
-                                                # Stop if we've reached the end of existing sets and no new score
-                                                break
-                                        
-                                        # Show calculated set wins
-                                        if sets_to_enter:
-                                            wins1 = sum(1 for s1, s2 in sets_to_enter if s1 > s2)
-                                            wins2 = sum(1 for s1, s2 in sets_to_enter if s2 > s1)
-                                            st.info(f"**Sets gewonnen:** {match.team1.display_name}: {wins1} - {match.team2.display_name}: {wins2}")
-                                        
-                                        if st.button("💾 Opslaan", key=f"save_{match.id}"):
-                                            match.sets = sets_to_enter
-                                            match.save()
-                                            st.success("✅ Match opgeslagen!")
-                                            st.rerun()
-                                    else:
-                                        # Padel or other: simple set count
-                                        col1, col2, col3, col4 = st.columns(4)
-                                        with col1:
-                                            st.write(f"**{match.team1.display_name}**")
-                                        with col2:
-                                            current_score1 = match.team1_score if match.team1_score is not None else 0
-                                            score1 = st.number_input("Sets gewonnen", min_value=0, key=f"score1_{match.id}", value=current_score1)
-                                        with col3:
-                                            st.write(f"**{match.team2.display_name}**")
-                                        with col4:
-                                            current_score2 = match.team2_score if match.team2_score is not None else 0
-                                            score2 = st.number_input("Sets gewonnen", min_value=0, key=f"score2_{match.id}", value=current_score2)
-                                        
-                                        if st.button("💾 Opslaan", key=f"save_{match.id}"):
-                                            match.team1_score = score1
-                                            match.team2_score = score2
-                                            match.save()
-                                            st.success("✅ Match opgeslagen!")
-                                            st.rerun()
-                        
-                        if played:
-                            st.markdown("#### Gespeelde Matches (Aanpasbaar)")
-                            for match in played:
-                                # Show match result
-                                if match.sets:
-                                    sets_str = ", ".join([f"{s1}-{s2}" for s1, s2 in match.sets])
-                                    wins1, wins2 = match._calculate_set_wins()
-                                    title = f"✅ {match.team1.display_name} vs {match.team2.display_name} - Sets: {sets_str} ({wins1}-{wins2})"
-                                else:
-                                    title = f"✅ {match.team1.display_name} vs {match.team2.display_name} - {match.team1_score}-{match.team2_score}"
-                                
-                                with st.expander(title):
-                                    is_table_tennis = tournament.sport_type == "Tafeltennis"
-                                    
-                                    if is_table_tennis and match.sets:
-                                        # Table tennis: edit sets
-                                        st.markdown("**Sets bewerken:**")
-                                        max_sets = 7
-                                        
-                                        sets_to_enter = []
-                                        for i in range(max_sets):
-                                            col_set1, col_sep, col_set2 = st.columns([2, 1, 2])
-                                            with col_set1:
-                                                score1 = st.number_input(
-                                                    f"Set {i+1} - {match.team1.display_name}",
-                                                    min_value=0,
-                                                    max_value=20,
-                                                    key=f"edit_set_{match.id}_{i}_1",
-                                                    value=match.sets[i][0] if i < len(match.sets) else 0
-                                                )
-                                            with col_sep:
-                                                st.markdown("**-**")
-                                            with col_set2:
-                                                score2 = st.number_input(
-                                                    f"Set {i+1} - {match.team2.display_name}",
-                                                    min_value=0,
-                                                    max_value=20,
-                                                    key=f"edit_set_{match.id}_{i}_2",
-                                                    value=match.sets[i][1] if i < len(match.sets) else 0
-                                                )
-                                            
-                                            if score1 > 0 or score2 > 0:
-                                                sets_to_enter.append((score1, score2))
-                                            elif i >= len(match.sets):
-                                                break
-                                        
-                                        if sets_to_enter:
-                                            wins1 = sum(1 for s1, s2 in sets_to_enter if s1 > s2)
-                                            wins2 = sum(1 for s1, s2 in sets_to_enter if s2 > s1)
-                                            st.info(f"**Sets gewonnen:** {match.team1.display_name}: {wins1} - {match.team2.display_name}: {wins2}")
-                                        
-                                        col_save, col_delete = st.columns(2)
-                                        with col_save:
-                                            if st.button("💾 Opslaan", key=f"update_{match.id}"):
-                                                match.sets = sets_to_enter
-                                                match.save()
-                                                st.success("✅ Match bijgewerkt!")
-                                                st.rerun()
-                                        with col_delete:
-                                            if st.button("🗑️ Score Verwijderen", key=f"clear_{match.id}"):
-                                                match.sets = []
-                                                match.team1_score = None
-                                                match.team2_score = None
-                                                match.save()
-                                                st.success("✅ Score verwijderd!")
-                                                st.rerun()
-                                    else:
-                                        # Padel or old format: edit set count
-                                        col1, col2, col3, col4 = st.columns(4)
-                                        with col1:
-                                            st.write(f"**{match.team1.display_name}**")
-                                        with col2:
-                                            current_score1 = match.team1_score if match.team1_score is not None else 0
-                                            score1 = st.number_input("Sets gewonnen", min_value=0, key=f"edit_score1_{match.id}", value=current_score1)
-                                        with col3:
-                                            st.write(f"**{match.team2.display_name}**")
-                                        with col4:
-                                            current_score2 = match.team2_score if match.team2_score is not None else 0
-                                            score2 = st.number_input("Sets gewonnen", min_value=0, key=f"edit_score2_{match.id}", value=current_score2)
-                                        
-                                        col_save, col_delete = st.columns(2)
-                                        with col_save:
-                                            if st.button("💾 Opslaan", key=f"update_{match.id}"):
-                                                match.team1_score = score1
-                                                match.team2_score = score2
-                                                match.save()
-                                                st.success("✅ Match bijgewerkt!")
-                                                st.rerun()
-                                        with col_delete:
-                                            if st.button("🗑️ Score Verwijderen", key=f"clear_{match.id}"):
-                                                match.sets = []
-                                                match.team1_score = None
-                                                match.team2_score = None
-                                                match.save()
-                                                st.success("✅ Score verwijderd!")
-                                                st.rerun()
+                        st.info(f"ℹ️ Er zijn al {len(matches)} matches voor dit toernooi")
+
+
+def render_standings(tournament: Tournament):
+    """Standings of the selected phase"""
+    st.markdown("### 📊 Standen")
+    
+    if not tournament.has_matches():
+        st.info("Genereer eerst matches via het 'Teams & Spelers' tabblad")
+    else:
+        phases = ["poule", "knockout", "consolation"] if tournament.tournament_type == "default_tournament" else ["poule"]
+        phase = st.selectbox("Selecteer Fase", phases, **kept(f"phase_select_{tournament.id}", phases))
+        
+        standings = tournament.get_standings(phase=phase)
+        
+        if phase == "poule" and tournament.tournament_type == "default_tournament":
+            # Show standings per poule
+            if not standings.empty and "Poule" in standings.columns:
+                # Group by poule
+                poules = standings["Poule"].unique()
+                poules_sorted = sorted(poules)
+                
+                for poule_name in poules_sorted:
+                    poule_data = standings[standings["Poule"] == poule_name].copy()
+                    # Remove Poule column for display
+                    poule_display = poule_data.drop(columns=["Poule"])
+                    
+                    st.markdown(f"#### 📋 Poule {poule_name}")
+                    st.dataframe(poule_display, use_container_width=True, hide_index=True)
+                    st.markdown("---")
+            elif standings.empty:
+                st.info("Geen standen beschikbaar voor poule fase")
+            else:
+                # Fallback if structure is different
+                st.dataframe(standings, use_container_width=True)
+        else:
+            # For knockout/consolation or round-robin, show all standings
+            if not standings.empty:
+                st.dataframe(standings, use_container_width=True)
+            else:
+                st.info("Geen standen beschikbaar voor deze fase")
+
+
+def render_matches(tournament: Tournament):
+    """Score entry for the matches of the selected phase"""
+    st.markdown("### 🎯 Matches Invoeren")
+    
+    if not tournament.has_matches():
+        st.info("Genereer eerst matches via het 'Teams & Spelers' tabblad")
+    else:
+        # Filter matches by phase
+        phases = ["poule", "knockout", "consolation"] if tournament.tournament_type == "default_tournament" else ["poule"]
+        phase = st.selectbox("Selecteer Fase", phases, **kept(f"match_phase_{tournament.id}", phases))
+        
+        # Only the matches of the selected phase are loaded
+        phase_matches = tournament.get_matches(phase)
+        
+        if not phase_matches:
+            st.info(f"Geen matches in fase '{phase}'")
+        else:
+            render_match_list(tournament, phase, phase_matches)
+        
+        # Generate knockout bracket button (for default tournament)
+        if (tournament.tournament_type == "default_tournament" and 
+            isinstance(tournament, get_tournament_class("default_tournament"))):
+            poule_matches = phase_matches if phase == "poule" else tournament.get_matches("poule")
+            knockout_matches = phase_matches if phase == "knockout" else tournament.get_matches("knockout")
+            
+            if poule_matches and not knockout_matches:
+                all_played = all(m.is_played for m in poule_matches)
+                if all_played:
+                    if st.button("🎯 Knockout Bracket Genereren", type="primary", key=f"gen_knockout_{tournament.id}"):
+                        try:
+                            generated = tournament.generate_knockout_matches()
+                            st.success(f"✅ Knockout bracket gegenereerd! ({len(generated)} matches)")
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"❌ Fout: {e}")
+                else:
+                    st.info("ℹ️ Speel eerst alle poule matches voordat je knockout bracket genereert")
+
+
+def render_match_list(tournament: Tournament, phase: str, phase_matches: List[Match]):
+    """
+    Filterable, paginated match list: at most MATCHES_PER_PAGE entries are
+    rendered, as expanders or (compact) as one table with a single editor.
+    The grid mode edits all filtered matches at once.
+    """
+    poule_names = dict(get_poules_by_tournament(tournament.id, phase)) if phase == "poule" else {}
+    teams = {team.id: team for team in tournament.get_teams()}
+    
+    col_status, col_poule, col_team, col_mode = st.columns([2, 2, 3, 2])
+    with col_status:
+        status = st.selectbox("Status", MATCH_STATUSES, **kept(f"match_status_{tournament.id}", MATCH_STATUSES))
+    with col_poule:
+        poule_id = st.selectbox(
+            "Poule",
+            [None] + list(poule_names),
+            format_func=lambda pid: "Alle" if pid is None else f"Poule {poule_names[pid]}",
+            disabled=not poule_names,
+            **kept(f"match_poule_{tournament.id}_{phase}", [None] + list(poule_names))
+        )
+    with col_team:
+        team_id = st.selectbox(
+            "Team",
+            [None] + list(teams),
+            format_func=lambda tid: "Alle" if tid is None else teams[tid].display_name,
+            **kept(f"match_team_{tournament.id}", [None] + list(teams))
+        )
+    with col_mode:
+        mode = st.selectbox("Weergave", MATCH_LIST_MODES, **kept(f"match_mode_{tournament.id}", MATCH_LIST_MODES))
+    
+    # Unplayed matches first
+    filtered = [m for m in phase_matches if not m.is_played] + [m for m in phase_matches if m.is_played]
+    if status == "Nog te spelen":
+        filtered = [m for m in filtered if not m.is_played]
+    elif status == "Gespeeld":
+        filtered = [m for m in filtered if m.is_played]
+    if poule_id is not None:
+        filtered = [m for m in filtered if m.poule_id == poule_id]
+    if team_id is not None:
+        filtered = [m for m in filtered if team_id in (m.team1.id, m.team2.id)]
+    
+    if not filtered:
+        st.info("Geen matches voor deze filters")
+        return
+    
+    if mode == "Raster":
+        render_results_grid(tournament, phase, filtered)
+        return
+    
+    page_count = (len(filtered) - 1) // MATCHES_PER_PAGE + 1
+    page_key = f"match_page_{tournament.id}_{phase}"
+    page_args = kept(page_key)
+    if st.session_state.get(page_key, 1) > page_count:
+        st.session_state[page_key] = page_count  # Fewer pages after filtering
+    page = st.number_input(f"Pagina (van {page_count})", min_value=1, max_value=page_count, **page_args)
+    page_matches = filtered[(page - 1) * MATCHES_PER_PAGE:page * MATCHES_PER_PAGE]
+    st.caption(f"{len(filtered)} matches")
+    
+    if mode == "Compact":
+        # One table for the page, only the selected match gets input widgets
+        import pandas as pd
+        st.dataframe(pd.DataFrame([{
+            'Poule': poule_names.get(m.poule_id, '-'),
+            'Team 1': m.team1.display_name,
+            'Score': f"{m.team1_score}-{m.team2_score}" if m.is_played else '-',
+            'Team 2': m.team2.display_name,
+            'Status': 'Gespeeld' if m.is_played else 'Niet gespeeld'
+        } for m in page_matches]), use_container_width=True, hide_index=True)
+        
+        selected = st.selectbox(
+            "Match invoeren / bewerken",
+            page_matches,
+            index=None,
+            format_func=lambda m: f"{m.team1.display_name} vs {m.team2.display_name}",
+            key=f"match_selected_{tournament.id}_{phase}"
+        )
+        if selected is not None:
+            render_match_entry(tournament, selected)
+        return
+    
+    unplayed = [m for m in page_matches if not m.is_played]
+    played = [m for m in page_matches if m.is_played]
+    
+    if unplayed:
+        st.markdown("#### Nog Te Spelen")
+        for match in unplayed:
+            render_match_entry(tournament, match)
+    
+    if played:
+        st.markdown("#### Gespeelde Matches (Aanpasbaar)")
+        for match in played:
+            render_match_entry(tournament, match)
+
+
+def render_results_grid(tournament: Tournament, phase: str, matches: List[Match]):
+    """Spreadsheet-style entry of many results, saved in one transaction"""
+    from utils.score_grid import results_frame, apply_results
+    
+    with_sets = tournament.sport_type == "Tafeltennis"
+    st.caption("Vul sets in als 11-9; laat leeg om een uitslag te wissen. Filter op poule om één poule in te vullen.")
+    
+    with st.form(key=f"results_grid_form_{tournament.id}_{phase}"):
+        edited = st.data_editor(
+            results_frame(matches, with_sets),
+            column_config={'ID': None},  # Hidden, used to match the rows
+            disabled=['Team 1', 'Team 2'],
+            hide_index=True,
+            use_container_width=True,
+            key=f"results_grid_{tournament.id}_{phase}"
+        )
+        submitted = st.form_submit_button("💾 Alles Opslaan", type="primary")
+    
+    if submitted:
+        changed, errors = apply_results(matches, edited, with_sets)
+        if errors:
+            st.error("❌ Niets opgeslagen:\n\n" + "\n".join(f"- {error}" for error in errors))
+        elif not changed:
+            st.info("Geen wijzigingen")
+        else:
+            try:
+                # One transaction: every changed row, the standings delta and the bracket
+                Match.save_many(changed)
+                st.success(f"✅ {len(changed)} matches opgeslagen!")
+                st.rerun()
+            except ValueError as e:
+                st.error(f"❌ Fout: {e}")
+
+
+@st.fragment
+def render_match_entry(tournament: Tournament, match: Match):
+    """
+    Score entry for one match, run as a fragment: saving a poule result reruns
+    only this entry and shows the refreshed poule standings from the standings store
+    """
+    if not match.is_played:
+        # Determine if it's table tennis (needs set scores)
+        is_table_tennis = tournament.sport_type == "Tafeltennis"
+        
+        with st.expander(f"⚪ {match.team1.display_name} vs {match.team2.display_name}"):
+            if is_table_tennis:
+                # Table tennis: per set scores (e.g., 11-9, 11-7, etc.)
+                st.markdown("**Sets invoeren (bijv. 11-9, 11-7, 9-11):**")
+                max_sets = 7  # Maximum sets for a match
+                
+                sets_to_enter = []
+                for i in range(max_sets):
+                    col_set1, col_sep, col_set2 = st.columns([2, 1, 2])
+                    with col_set1:
+                        score1 = st.number_input(
+                            f"Set {i+1} - {match.team1.display_name}",
+                            min_value=0,
+                            max_value=20,
+                            key=f"set_{match.id}_{i}_1",
+                            value=match.sets[i][0] if i < len(match.sets) else 0
+                        )
+                    with col_sep:
+                        st.markdown("**-**")
+                    with col_set2:
+                        score2 = st.number_input(
+                            f"Set {i+1} - {match.team2.display_name}",
+                            min_value=0,
+                            max_value=20,
+                            key=f"set_{match.id}_{i}_2",
+                            value=match.sets[i][1] if i < len(match.sets) else 0
+                        )
                     
-                    # Generate knockout bracket button (for default tournament)
-                    if (tournament.tournament_type == "default_tournament" and 
-                        isinstance(tournament, DefaultTournament)):
-                        poule_matches = [m for m in matches if m.phase == MatchPhase.POULE]
-                        knockout_matches = [m for m in matches if m.phase == MatchPhase.KNOCKOUT]
-                        
-                        if poule_matches and not knockout_matches:
-                            all_played = all(m.is_played for m in poule_matches)
-                            if all_played:
-                                if st.button("🎯 Knockout Bracket Genereren", type="primary", key=f"gen_knockout_{tournament.id}"):
-                                    try:
-                                        generated = tournament.generate_knockout_matches()
-                                        st.success(f"✅ Knockout bracket gegenereerd! ({len(generated)} matches)")
-                                        st.rerun()
-                                    except Exception as e:
-                                        st.error(f"❌ Fout: {e}")
-                            else:
-                                st.info("ℹ️ Speel eerst alle poule matches voordat je knockout bracket genereert")
+                    # Only add set if at least one score is > 0
+                    if score1 > 0 or score2 > 0:
+                        sets_to_enter.append((score1, score2))
+                    elif i >= len(match.sets):
+                        # Stop if we've reached the end of existing sets and no new score
+                        break
+                
+                # Show calculated set wins
+                if sets_to_enter:
+                    wins1 = sum(1 for s1, s2 in sets_to_enter if s1 > s2)
+                    wins2 = sum(1 for s1, s2 in sets_to_enter if s2 > s1)
+                    st.info(f"**Sets gewonnen:** {match.team1.display_name}: {wins1} - {match.team2.display_name}: {wins2}")
+                
+                if st.button("💾 Opslaan", key=f"save_{match.id}"):
+                    match.sets = sets_to_enter
+                    match.save()
+                    after_match_save(tournament, match, "✅ Match opgeslagen!")
+            else:
+                # Padel or other: simple set count
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.write(f"**{match.team1.display_name}**")
+                with col2:
+                    current_score1 = match.team1_score if match.team1_score is not None else 0
+                    score1 = st.number_input("Sets gewonnen", min_value=0, key=f"score1_{match.id}", value=current_score1)
+                with col3:
+                    st.write(f"**{match.team2.display_name}**")
+                with col4:
+                    current_score2 = match.team2_score if match.team2_score is not None else 0
+                    score2 = st.number_input("Sets gewonnen", min_value=0, key=f"score2_{match.id}", value=current_score2)
+                
+                if st.button("💾 Opslaan", key=f"save_{match.id}"):
+                    match.team1_score = score1
+                    match.team2_score = score2
+                    match.save()
+                    after_match_save(tournament, match, "✅ Match opgeslagen!")
+    else:
+        # Show match result
+        if match.sets:
+            sets_str = ", ".join([f"{s1}-{s2}" for s1, s2 in match.sets])
+            wins1, wins2 = match._calculate_set_wins()
+            title = f"✅ {match.team1.display_name} vs {match.team2.display_name} - Sets: {sets_str} ({wins1}-{wins2})"
+        else:
+            title = f"✅ {match.team1.display_name} vs {match.team2.display_name} - {match.team1_score}-{match.team2_score}"
+        
+        with st.expander(title):
+            is_table_tennis = tournament.sport_type == "Tafeltennis"
             
-            with tab_settings:
-                st.markdown("### ⚙️ Toernooi Instellingen")
-                st.write(f"**Naam:** {tournament.name}")
-                st.write(f"**Sport:** {tournament.sport_type}")
-                st.write(f"**Type:** {tournament.tournament_type}")
-                st.write(f"**Team Type:** {tournament.team_type}")
-                st.write(f"**Troostfinale:** {'Ja' if tournament.has_consolation else 'Nee'}")
-                st.write(f"**Aangemaakt:** {tournament.created_at}")
+            if is_table_tennis and match.sets:
+                # Table tennis: edit sets
+                st.markdown("**Sets bewerken:**")
+                max_sets = 7
+                
+                sets_to_enter = []
+                for i in range(max_sets):
+                    col_set1, col_sep, col_set2 = st.columns([2, 1, 2])
+                    with col_set1:
+                        score1 = st.number_input(
+                            f"Set {i+1} - {match.team1.display_name}",
+                            min_value=0,
+                            max_value=20,
+                            key=f"edit_set_{match.id}_{i}_1",
+                            value=match.sets[i][0] if i < len(match.sets) else 0
+                        )
+                    with col_sep:
+                        st.markdown("**-**")
+                    with col_set2:
+                        score2 = st.number_input(
+                            f"Set {i+1} - {match.team2.display_name}",
+                            min_value=0,
+                            max_value=20,
+                            key=f"edit_set_{match.id}_{i}_2",
+                            value=match.sets[i][1] if i < len(match.sets) else 0
+                        )
+                    
+                    if score1 > 0 or score2 > 0:
+                        sets_to_enter.append((score1, score2))
+                    elif i >= len(match.sets):
+                        break
+                
+                if sets_to_enter:
+                    wins1 = sum(1 for s1, s2 in sets_to_enter if s1 > s2)
+                    wins2 = sum(1 for s1, s2 in sets_to_enter if s2 > s1)
+                    st.info(f"**Sets gewonnen:** {match.team1.display_name}: {wins1} - {match.team2.display_name}: {wins2}")
+                
+                col_save, col_delete = st.columns(2)
+                with col_save:
+                    if st.button("💾 Opslaan", key=f"update_{match.id}"):
+                        match.sets = sets_to_enter
+                        try:
+                            match.save()
+                            after_match_save(tournament, match, "✅ Match bijgewerkt!")
+                        except ValueError as e:
+                            st.error(f"❌ Fout: {e}")
+                with col_delete:
+                    if st.button("🗑️ Score Verwijderen", key=f"clear_{match.id}"):
+                        match.sets = []
+                        match.team1_score = None
+                        match.team2_score = None
+                        try:
+                            match.save()
+                            after_match_save(tournament, match, "✅ Score verwijderd!")
+                        except ValueError as e:
+                            st.error(f"❌ Fout: {e}")
+            else:
+                # Padel or old format: edit set count
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.write(f"**{match.team1.display_name}**")
+                with col2:
+                    current_score1 = match.team1_score if match.team1_score is not None else 0
+                    score1 = st.number_input("Sets gewonnen", min_value=0, key=f"edit_score1_{match.id}", value=current_score1)
+                with col3:
+                    st.write(f"**{match.team2.display_name}**")
+                with col4:
+                    current_score2 = match.team2_score if match.team2_score is not None else 0
+                    score2 = st.number_input("Sets gewonnen", min_value=0, key=f"edit_score2_{match.id}", value=current_score2)
+                
+                col_save, col_delete = st.columns(2)
+                with col_save:
+                    if st.button("💾 Opslaan", key=f"update_{match.id}"):
+                        match.team1_score = score1
+                        match.team2_score = score2
+                        try:
+                            match.save()
+                            after_match_save(tournament, match, "✅ Match bijgewerkt!")
+                        except ValueError as e:
+                            st.error(f"❌ Fout: {e}")
+                with col_delete:
+                    if st.button("🗑️ Score Verwijderen", key=f"clear_{match.id}"):
+                        match.sets = []
+                        match.team1_score = None
+                        match.team2_score = None
+                        try:
+                            match.save()
+                            after_match_save(tournament, match, "✅ Score verwijderd!")
+                        except ValueError as e:
+                            st.error(f"❌ Fout: {e}")
+    
+    saved_message = st.session_state.pop(f"saved_{match.id}", None)
+    if saved_message:
+        st.success(saved_message)
+        standings = tournament.get_standings(phase="poule", poule_id=match.poule_id)
+        if not standings.empty:
+            st.dataframe(standings, use_container_width=True)
+
+
+def after_match_save(tournament: Tournament, match: Match, message: str):
+    """
+    Rerun after a saved result: only the fragment for poule matches, the whole
+    app when other matches change (bracket) or the knockout can be generated
+    """
+    poules_finished = (isinstance(tournament, get_tournament_class("default_tournament"))
+                       and tournament.all_poule_matches_played())
+    if match.phase == MatchPhase.POULE and not poules_finished:
+        st.session_state[f"saved_{match.id}"] = message
+        try:
+            st.rerun(scope="fragment")
+        except StreamlitAPIException:
+            # Button handled in a full run (not a fragment rerun)
+            st.rerun()
+    else:
+        st.rerun()
+
+
+def render_settings(tournament: Tournament):
+    """Tournament details"""
+    st.markdown("### ⚙️ Toernooi Instellingen")
+    st.write(f"**Naam:** {tournament.name}")
+    st.write(f"**Sport:** {tournament.sport_type}")
+    st.write(f"**Type:** {tournament.tournament_type}")
+    st.write(f"**Team Type:** {tournament.team_type}")
+    st.write(f"**Troostfinale:** {'Ja' if tournament.has_consolation else 'Nee'}")
+    st.write(f"**Aangemaakt:** {tournament.created_at}")
+
+
+def render_query_panel():
+    """Debug panel with the queries of this rerun (only with instrumentation enabled)"""
+    log = current_query_log()
+    if log is None:
+        return
+    with st.sidebar.expander(f"🐞 Queries: {log.count} ({log.total_ms:.1f} ms)", expanded=False):
+        if log.count:
+            import pandas as pd
+            st.dataframe(pd.DataFrame(log.summary()).rename(columns={
+                'sql': 'Query', 'count': 'Aantal', 'total_ms': 'Tijd (ms)', 'rows': 'Rijen'
+            }), use_container_width=True, hide_index=True)
+        else:
+            st.caption("Geen queries (alles uit de cache)")
+
+
+# Main app
+st.title("🏆 Toernooi Beheer Systeem")
+st.markdown("Tafeltennis & Padel Toernooien")
+
+# Navigation in session state, so only the active view is rendered
+if 'current_tab' not in st.session_state:
+    st.session_state.current_tab = "overview"
+
+# If tournament was just created, switch to overview
+if 'created_tournament_id' in st.session_state:
+    st.session_state.current_tab = "overview"
+
+current_tab = st.radio(
+    "Navigatie",
+    list(VIEWS),
+    format_func=VIEWS.get,
+    horizontal=True,
+    label_visibility="collapsed",
+    key="current_tab"
+)
+
+if current_tab == "new":
+    render_new_tournament()
+else:
+    render_overview()
+
+render_query_panel()
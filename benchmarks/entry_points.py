@@ -0,0 +1,154 @@
+"""
+Entry point benchmark - times the main model and tournament entry points on
+synthetic tournaments (10 to 2,000 teams, single and double) and prints JSON
+that can be compared across commits.
+
+Usage: python -m benchmarks.entry_points [--sizes 10 100 500 2000] [--output results.json]
+"""
+import argparse
+import json
+import platform
+import sqlite3
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+import cache
+from benchmarks.standings_engine import best_of
+from benchmarks.synthetic import throwaway_database, create_tournament, play_matches
+
+SIZES = [10, 100, 500, 2000]
+TEAM_TYPES = ["single", "double"]
+# Round-robin plays n*(n-1)/2 matches, so it is only measured up to this size
+ROUND_ROBIN_MAX_TEAMS = 200
+
+
+def timed(func) -> float:
+    """Wall time of one call, in milliseconds"""
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def cold(func):
+    """Run `func` with an empty read cache (as after a write)"""
+    def run():
+        cache.clear()
+        return func()
+    return run
+
+
+def simulate_rerun(tournament_id: int, phase: str = "poule"):
+    """The model reads of one app rerun on the matches and standings views"""
+    from models.session import begin_session
+    from models.tournament import Tournament
+    from models.player import Player
+    from utils.poules import get_poules_by_tournament
+    
+    begin_session()
+    tournaments = {t.id: t for t in Tournament.get_all()}
+    tournament = tournaments[tournament_id]
+    if tournament.has_matches():
+        tournament.get_teams()
+        Player.get_by_tournament(tournament_id)
+        get_poules_by_tournament(tournament_id, phase)
+        tournament.get_matches(phase)
+        tournament.get_matches("knockout")
+        tournament.get_standings(phase)
+
+
+def bench_default(num_teams: int, team_type: str) -> dict:
+    """Default tournament: poules, standings, qualification and knockout"""
+    from models.session import begin_session
+    from utils.bracket_generator import get_qualified_teams_from_poules, seed_bracket
+    
+    result = {"tournament_type": "default_tournament", "teams": num_teams, "team_type": team_type}
+    with throwaway_database():
+        tournament = create_tournament(num_teams, team_type)
+        begin_session()
+        
+        result["generate_matches_ms"] = timed(lambda: tournament.generate_matches())
+        matches = tournament.get_matches("poule")
+        result["matches"] = len(matches)
+        result["save_results_ms"] = timed(lambda: play_matches(matches))
+        
+        result["get_standings_ms"] = best_of(cold(lambda: tournament.get_standings("poule")))
+        result["get_standings_cached_ms"] = best_of(lambda: tournament.get_standings("poule"))
+        qualified = []
+        
+        def qualify():
+            qualified[:] = get_qualified_teams_from_poules(tournament.id, top_n=2)
+        
+        result["get_qualified_teams_ms"] = best_of(cold(qualify))
+        result["seed_bracket_ms"] = best_of(lambda: seed_bracket(qualified))
+        result["app_rerun_ms"] = best_of(cold(lambda: simulate_rerun(tournament.id)))
+        result["app_rerun_cached_ms"] = best_of(lambda: simulate_rerun(tournament.id))
+        result["generate_knockout_matches_ms"] = timed(lambda: tournament.generate_knockout_matches())
+    return result
+
+
+def bench_round_robin(num_teams: int, team_type: str) -> dict:
+    """Round-robin tournament: every team plays every other team"""
+    from models.session import begin_session
+    
+    result = {"tournament_type": "round_robin", "teams": num_teams, "team_type": team_type}
+    with throwaway_database():
+        tournament = create_tournament(num_teams, team_type, tournament_type="round_robin")
+        begin_session()
+        
+        result["generate_matches_ms"] = timed(lambda: tournament.generate_matches())
+        matches = tournament.get_matches()
+        result["matches"] = len(matches)
+        result["save_results_ms"] = timed(lambda: play_matches(matches))
+        result["get_standings_ms"] = best_of(cold(lambda: tournament.get_standings()))
+        result["app_rerun_ms"] = best_of(cold(lambda: simulate_rerun(tournament.id)))
+    return result
+
+
+def git_commit() -> Optional[str]:
+    """Commit of the working tree, to compare results across commits"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes: List[int]) -> dict:
+    results = []
+    for num_teams in sizes:
+        for team_type in TEAM_TYPES:
+            results.append(bench_default(num_teams, team_type))
+            if num_teams <= ROUND_ROBIN_MAX_TEAMS:
+                results.append(bench_round_robin(num_teams, team_type))
+    for result in results:
+        for key, value in result.items():
+            if key.endswith("_ms"):
+                result[key] = round(value, 3)
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "results": results,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="numbers of teams")
+    parser.add_argument("--output", help="write the JSON to this file instead of stdout")
+    args = parser.parse_args()
+    
+    report = run(args.sizes)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Memory benchmark - traced memory of loading a 10k-match tournament into
+Match/Team/Player objects, and the time of the winner/loser lookups the
+standings loops do, printed as JSON that can be compared across commits.
+
+Usage: python -m benchmarks.memory [--teams 142]
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+import cache
+from benchmarks.entry_points import git_commit
+from benchmarks.standings_engine import best_of
+from benchmarks.synthetic import throwaway_database, create_tournament, play_matches
+
+# A round-robin of 142 teams plays 10,011 matches
+NUM_TEAMS = 142
+
+
+def traced(func: Callable) -> Tuple[object, int]:
+    """Result of `func` and the memory it still holds afterwards, in bytes"""
+    tracemalloc.start()
+    try:
+        result = func()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, current
+
+
+def instance_bytes(obj) -> int:
+    """Size of an object including its attribute dict (slotted objects have none)"""
+    return sys.getsizeof(obj) + (sys.getsizeof(obj.__dict__) if hasattr(obj, "__dict__") else 0)
+
+
+def result_lookups(matches: list):
+    """winner and loser of every match, twice (as the per-match standings loops did)"""
+    for match in matches:
+        for team in (match.team1, match.team2):
+            if match.winner is team:
+                pass
+            elif match.loser is team:
+                pass
+
+
+def run(num_teams: int) -> dict:
+    from models.session import begin_session
+    
+    with throwaway_database():
+        tournament = create_tournament(num_teams, tournament_type="round_robin")
+        begin_session()
+        tournament.generate_matches()
+        play_matches(tournament.get_matches())
+        
+        def load():
+            begin_session()
+            return tournament.get_matches()
+        
+        # Cold: the database rows plus the model objects; warm: model objects only
+        cache.clear()
+        matches, load_bytes = traced(load)
+        matches, object_bytes = traced(load)
+        
+        start = time.perf_counter()
+        result_lookups(matches)
+        first_lookups_ms = (time.perf_counter() - start) * 1000
+        return {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "teams": num_teams,
+            "matches": len(matches),
+            "load_kib": round(load_bytes / 1024, 1),
+            "objects_kib": round(object_bytes / 1024, 1),
+            "bytes_per_match": round(object_bytes / len(matches), 1),
+            "match_instance_bytes": instance_bytes(matches[0]),
+            "team_instance_bytes": instance_bytes(matches[0].team1),
+            "first_result_lookups_ms": round(first_lookups_ms, 3),
+            "result_lookups_ms": round(best_of(lambda: result_lookups(matches)), 3),
+        }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--teams", type=int, default=NUM_TEAMS, help="teams in the round-robin tournament")
+    args = parser.parse_args()
+    
+    json.dump(run(args.teams), sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Standings engine benchmark - poule standings of a seeded tournament with 1k
+and 10k played matches: the engine path (MatchTable.load -> compute_standings,
+which ranks with rank_standings) against the per-match Python loop the
+tournament types used before (Match objects -> loop -> DataFrame).
+Both start from an empty read cache and identity map, as after a write;
+the *_in_memory timings leave out the database load.
+
+Usage: python -m benchmarks.standings_engine
+"""
+import json
+import sys
+import time
+from typing import List, Dict, Callable, Tuple
+
+import pandas as pd
+
+import cache
+from benchmarks.synthetic import throwaway_database, create_tournament, play_matches
+from models.match import Match, MatchPhase
+from utils.standings import MatchTable, compute_standings
+
+SIZES = [1_000, 10_000]
+# Poules of 4 teams play 6 matches
+TEAMS_PER_MATCH = 4 / 6
+REPEAT = 5
+
+
+def loop_standings(matches: List[Match], poules: List[Tuple[int, str]]) -> pd.DataFrame:
+    """The per-match loop (and DataFrame) of the poule standings before the standings engine"""
+    poule_stats: Dict[int, Dict[int, dict]] = {poule_id: {} for poule_id, _ in poules}
+    for match in matches:
+        if not match.is_played or match.poule_id not in poule_stats:
+            continue
+        stats = poule_stats[match.poule_id]
+        for team, own, other in ((match.team1, match.team1_score, match.team2_score),
+                                 (match.team2, match.team2_score, match.team1_score)):
+            if team.id not in stats:
+                stats[team.id] = {'name': team.display_name, 'wins': 0, 'losses': 0,
+                                  'points_for': 0, 'points_against': 0}
+            stats[team.id]['points_for'] += own or 0
+            stats[team.id]['points_against'] += other or 0
+            if match.winner == team:
+                stats[team.id]['wins'] += 1
+            elif match.loser == team:
+                stats[team.id]['losses'] += 1
+    
+    all_standings = []
+    for poule_id, poule_name in poules:
+        standings_data = [{'Poule': poule_name, 'Team': stat['name'], 'Gewonnen': stat['wins'],
+                           'Verloren': stat['losses'], 'Punten Voor': stat['points_for'],
+                           'Punten Tegen': stat['points_against'],
+                           'Saldo': stat['points_for'] - stat['points_against']}
+                          for stat in poule_stats[poule_id].values()]
+        standings_data.sort(key=lambda x: (x['Gewonnen'], x['Saldo']), reverse=True)
+        all_standings.extend(standings_data)
+    
+    df = pd.DataFrame(all_standings)
+    if not df.empty:
+        df.reset_index(drop=True, inplace=True)
+        df.index = df.index + 1
+    return df
+
+
+def load_matches(tournament_id: int) -> List[Match]:
+    """Poule matches as Match/Team/Player objects, from a fresh identity map"""
+    from models.session import begin_session
+    
+    begin_session()
+    return Match.get_by_tournament(tournament_id, MatchPhase.POULE)
+
+
+def cold(func: Callable) -> Callable:
+    """Run `func` with an empty read cache"""
+    def run():
+        cache.clear()
+        return func()
+    return run
+
+
+def best_of(func: Callable, repeat: int = REPEAT) -> float:
+    """Best wall time of `repeat` runs, in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def bench(num_matches: int) -> dict:
+    from utils.poules import get_poules_by_tournament
+    
+    with throwaway_database():
+        tournament = create_tournament(round(num_matches * TEAMS_PER_MATCH))
+        tournament.generate_matches()
+        play_matches(tournament.get_matches("poule"))
+        tournament_id = tournament.id
+        
+        def loop_path():
+            poules = get_poules_by_tournament(tournament_id, MatchPhase.POULE.value)
+            return loop_standings(load_matches(tournament_id), poules)
+        
+        def engine_path():
+            return compute_standings(MatchTable.load(tournament_id, MatchPhase.POULE.value))
+        
+        matches = load_matches(tournament_id)
+        poules = get_poules_by_tournament(tournament_id, MatchPhase.POULE.value)
+        table = MatchTable.load(tournament_id, MatchPhase.POULE.value)
+        return {
+            "matches": len(matches),
+            "loop_ms": round(best_of(cold(loop_path)), 3),
+            "engine_ms": round(best_of(cold(engine_path)), 3),
+            "loop_in_memory_ms": round(best_of(lambda: loop_standings(matches, poules)), 3),
+            "engine_in_memory_ms": round(best_of(lambda: compute_standings(table)), 3),
+        }
+
+
+def run() -> List[dict]:
+    return [bench(size) for size in SIZES]
+
+
+if __name__ == "__main__":
+    json.dump(run(), sys.stdout, indent=2)
+    print()
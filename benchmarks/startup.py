@@ -0,0 +1,109 @@
+"""
+Startup benchmark - import cost of the app and its modules, measured with
+`python -X importtime` in a fresh interpreter per import, and printed as JSON
+that can be compared across commits.
+
+Usage: python -m benchmarks.startup [--repeat 5] [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+from benchmarks.entry_points import git_commit
+
+# Modules measured on their own; "app" is the whole Streamlit script in bare mode
+MODULES = [
+    "database",
+    "models",
+    "models.tournament",
+    "tournament_types",
+    "tournament_types.default_tournament",
+    "tournament_types.round_robin",
+    "utils.standings",
+    "utils.score_grid",
+    "app",
+]
+# Dependencies that should only load when a view needs them
+HEAVY_MODULES = ["pandas", "numpy", "tournament_types.default_tournament", "tournament_types.round_robin"]
+SLOWEST_COUNT = 5
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module: str, workdir: str) -> Dict[str, Tuple[int, int]]:
+    """
+    (self, cumulative) import time in microseconds of `module` and of every
+    module it imported, from `python -X importtime -c "import module"`
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=workdir, env=env, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package", nested imports are
+        # indented and printed before the module that imported them
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times.setdefault(name.strip(), (int(self_us), int(cumulative_us)))
+        if not name.startswith("  "):
+            if name.strip() == module:
+                return times
+            times = {}  # Interpreter startup (site etc.), not imported by `module`
+    raise RuntimeError(f"no import time reported for {module}")
+
+
+def bench_module(module: str, repeat: int) -> dict:
+    """Fastest of `repeat` imports of `module` (later runs have a warm file cache)"""
+    runs = []
+    # The app creates tournament.db in its working directory
+    with tempfile.TemporaryDirectory(prefix="tournament_startup_") as workdir:
+        for _ in range(repeat):
+            runs.append(import_times(module, workdir))
+    best = min(runs, key=lambda times: times[module][1])
+    
+    slowest = sorted(((name, cumulative) for name, (_, cumulative) in best.items() if name != module),
+                     key=lambda item: item[1], reverse=True)[:SLOWEST_COUNT]
+    return {
+        "module": module,
+        "cumulative_ms": best[module][1] / 1000,
+        "self_ms": best[module][0] / 1000,
+        "first_run_ms": runs[0][module][1] / 1000,
+        "modules_imported": len(best),
+        "heavy_imports": [name for name in HEAVY_MODULES if name in best and name != module],
+        "slowest_imports": [{"module": name, "cumulative_ms": cumulative / 1000} for name, cumulative in slowest],
+    }
+
+
+def run(modules: List[str], repeat: int) -> dict:
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "results": [bench_module(module, repeat) for module in modules],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=MODULES, help="modules to import")
+    parser.add_argument("--repeat", type=int, default=5, help="imports per module (the fastest is reported)")
+    parser.add_argument("--output", help="write the JSON to this file instead of stdout")
+    args = parser.parse_args()
+    
+    report = run(args.modules, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Synthetic tournaments - seeded random teams and set scores on a throwaway
+SQLite database, shared by the benchmarks
+"""
+import os
+import random
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+import cache
+import database
+from models.session import session_scope
+
+
+@contextmanager
+def throwaway_database() -> Iterator[str]:
+    """
+    Point the models at a fresh database file that is deleted afterwards.
+    The block runs in its own session with an empty read cache, so no loaded
+    object or cached row crosses between databases.
+    """
+    previous = database.DB_NAME
+    directory = tempfile.mkdtemp(prefix="tournament_bench_")
+    database.DB_NAME = os.path.join(directory, "tournament.db")
+    database.init_db()
+    cache.clear()
+    try:
+        with session_scope():
+            yield database.DB_NAME
+    finally:
+        cache.clear()
+        database.close_pools()
+        database.DB_NAME = previous
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def random_sets(rng: random.Random, best_of: int = 5) -> List[Tuple[int, int]]:
+    """Table tennis set scores until one side has won the majority of `best_of` sets"""
+    needed = best_of // 2 + 1
+    sets = []
+    wins1 = wins2 = 0
+    while wins1 < needed and wins2 < needed:
+        loser_points = rng.randint(0, 9)
+        if rng.random() < 0.5:
+            sets.append((11, loser_points))
+            wins1 += 1
+        else:
+            sets.append((loser_points, 11))
+            wins2 += 1
+    return sets
+
+
+def create_tournament(num_teams: int, team_type: str = "single",
+                      tournament_type: str = "default_tournament",
+                      sport_type: str = "Tafeltennis", has_consolation: bool = False):
+    """Save a tournament with `num_teams` teams (two players each for doubles)"""
+    from models.player import Player
+    from models.team import Team
+    from tournament_types import get_tournament_class
+    
+    tournament_class = get_tournament_class(tournament_type)
+    tournament = tournament_class(name=f"Benchmark {num_teams}", sport_type=sport_type,
+                                  tournament_type=tournament_type, team_type=team_type,
+                                  has_consolation=has_consolation)
+    tournament.save()
+    
+    players_per_team = 2 if team_type == "double" else 1
+    players = Player.bulk_create_in_tournament(
+        tournament.id, [f"Speler {i + 1}" for i in range(num_teams * players_per_team)])
+    if players_per_team == 2:
+        teams = [Team(tournament_id=tournament.id, player1=players[2 * i], player2=players[2 * i + 1])
+                 for i in range(num_teams)]
+    else:
+        teams = [Team(tournament_id=tournament.id, player1=player) for player in players]
+    Team.save_many(teams)
+    return tournament
+
+
+def play_matches(matches: list, sport_type: str = "Tafeltennis", seed: int = 42) -> list:
+    """Give every match a random result and save them all in one transaction"""
+    from models.match import Match
+    
+    rng = random.Random(seed)
+    for match in matches:
+        if sport_type == "Tafeltennis":
+            match.sets = random_sets(rng)
+        else:
+            match.team1_score, match.team2_score = rng.choice([(2, 0), (2, 1), (1, 2), (0, 2)])
+    Match.save_many(matches)
+    return matches
@@ -0,0 +1,67 @@
+"""
+Read cache - small LRU of query results, keyed by tournament ID and a
+per-tournament change counter. Every write bumps the counter of its
+tournament, so cached rows of unchanged tournaments are never re-queried
+and changed tournaments are never served stale.
+"""
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Optional, Dict, Callable
+
+import database
+
+# Maximum number of cached query results (least recently used are dropped first)
+CACHE_SIZE = 512
+
+# Counter key for data shared by all tournaments (the tournament list)
+ALL_TOURNAMENTS = None
+
+_versions: Dict[tuple, int] = {}
+_entries: 'OrderedDict[tuple, object]' = OrderedDict()
+_lock = threading.Lock()
+
+
+def version(tournament_id: Optional[int]) -> int:
+    """Current change counter of a tournament"""
+    return _versions.get((database.DB_NAME, tournament_id), 0)
+
+
+def invalidate(tournament_id: Optional[int]):
+    """Bump the change counter of a tournament; its cached results are no longer used"""
+    key = (database.DB_NAME, tournament_id)
+    with _lock:
+        _versions[key] = _versions.get(key, 0) + 1
+
+
+def clear():
+    """Drop all cached results"""
+    with _lock:
+        _entries.clear()
+
+
+def cached(func: Callable) -> Callable:
+    """
+    Cache a read function whose first argument is a tournament ID (or ALL_TOURNAMENTS).
+    Results are shared between callers and threads, so they must be immutable
+    (e.g. tuples of rows, read-only arrays); build model objects from them per call.
+    """
+    @wraps(func)
+    def wrapper(tournament_id, *args, **kwargs):
+        # Read the counter before querying: a write committed meanwhile bumps it,
+        # so a result that may predate the write is stored under an outdated key
+        key = (func.__module__, func.__qualname__, database.DB_NAME, tournament_id, version(tournament_id),
+               args, tuple(sorted(kwargs.items())))
+        with _lock:
+            if key in _entries:
+                _entries.move_to_end(key)
+                return _entries[key]
+        
+        result = func(tournament_id, *args, **kwargs)
+        with _lock:
+            _entries[key] = result
+            while len(_entries) > CACHE_SIZE:
+                _entries.popitem(last=False)
+        return result
+    
+    return wrapper
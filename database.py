@@ -1,139 +1,408 @@
 """
 Database setup and connection management
 """
+import os
+import re
 import sqlite3
-from typing import Optional
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Dict, List, Iterator, Sequence, Callable
 
 DB_NAME = "tournament.db"
 
+# PRAGMAs applied once to every pooled connection (name -> value)
+PRAGMAS: Dict[str, object] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,  # Negative = KiB, so ~16 MB page cache
+    "mmap_size": 64 * 1024 * 1024,
+    "busy_timeout": 5000,  # Milliseconds
+    "foreign_keys": "ON",
+}
 
-def get_connection() -> sqlite3.Connection:
-    """Get database connection"""
-    return sqlite3.connect(DB_NAME)
+# Maximum number of idle connections kept per database file
+POOL_SIZE = 8
 
+# Optional callback receiving every SQL statement run on pooled connections
+_trace_callback: Optional[Callable[[str], None]] = None
 
-def init_db():
-    """Initialize the database with all required tables"""
-    conn = get_connection()
-    c = conn.cursor()
+# Opt-in query instrumentation (statement fingerprint, duration, rows), see query_log()
+_instrumented = os.environ.get("TOURNAMENT_DEBUG_QUERIES") == "1"
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    SQLite connection owned by a ConnectionPool.
+    close() hands the connection back to the pool instead of closing it,
+    so existing `conn.close()` calls in the models keep working unchanged.
+    """
     
-    # Migrate existing tournaments table if needed (for backward compatibility)
-    try:
-        c.execute("SELECT team_type, has_consolation FROM tournaments LIMIT 1")
-    except sqlite3.OperationalError:
-        # Columns don't exist, add them
-        try:
-            c.execute('ALTER TABLE tournaments ADD COLUMN team_type TEXT DEFAULT "single"')
-        except sqlite3.OperationalError:
-            pass  # Column might already exist
-        try:
-            c.execute('ALTER TABLE tournaments ADD COLUMN has_consolation INTEGER DEFAULT 0')
-        except sqlite3.OperationalError:
-            pass  # Column might already exist
-        conn.commit()
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool: Optional['ConnectionPool'] = None
+        self.checked_out = False
+        self.changed_tournaments = set()  # Tournaments written in the open transaction()
+        self.rollback_hooks: List[Callable[[], None]] = []  # Undo in-memory changes on rollback
     
-    # Migrate players table if needed (add tournament_id if not exists)
-    try:
-        c.execute("SELECT tournament_id FROM players LIMIT 1")
-    except sqlite3.OperationalError:
-        # tournament_id doesn't exist, need to migrate
+    def close(self):
+        """Return the connection to its pool (or really close it when unpooled)"""
+        if self.pool is None:
+            super().close()
+        elif self.checked_out:
+            self.pool.release(self)
+        # Already back in the pool: a second close() is a no-op
+    
+    def dispose(self):
+        """Really close the underlying SQLite connection"""
+        self.pool = None
+        self.checked_out = False
+        super().close()
+
+
+class QueryRecord:
+    """One executed statement: fingerprint, wall time (including fetches) and rows"""
+    
+    def __init__(self, sql: str):
+        self.fingerprint = fingerprint(sql)
+        self.duration = 0.0  # Seconds
+        self.rows = 0
+    
+    def __repr__(self):
+        return f"QueryRecord({self.fingerprint!r}, {self.duration * 1000:.3f} ms, rows={self.rows})"
+
+
+class QueryLog:
+    """Statements recorded on the instrumented connections of one thread (e.g. one Streamlit rerun)"""
+    
+    def __init__(self):
+        self.records: List[QueryRecord] = []
+    
+    @property
+    def count(self) -> int:
+        """Number of executed statements"""
+        return len(self.records)
+    
+    @property
+    def total_ms(self) -> float:
+        """Total time spent in the database, in milliseconds"""
+        return sum(record.duration for record in self.records) * 1000
+    
+    def summary(self) -> List[dict]:
+        """Statements grouped by fingerprint, most expensive first"""
+        groups: Dict[str, dict] = {}
+        for record in self.records:
+            group = groups.setdefault(record.fingerprint, {"sql": record.fingerprint, "count": 0,
+                                                           "total_ms": 0.0, "rows": 0})
+            group["count"] += 1
+            group["total_ms"] += record.duration * 1000
+            group["rows"] += record.rows
+        return sorted(groups.values(), key=lambda group: group["total_ms"], reverse=True)
+    
+    def __len__(self):
+        return len(self.records)
+
+
+_query_logs = threading.local()
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor recording every statement (and the rows fetched from it) in the thread's QueryLog"""
+    
+    _record: Optional[QueryRecord] = None
+    
+    def _run(self, method: Callable, sql: str, *args):
+        log = current_query_log()
+        self._record = QueryRecord(sql) if log is not None else None
+        start = time.perf_counter()
         try:
-            # First, create backup of old players (if any exist)
-            c.execute('SELECT COUNT(*) FROM players')
-            count = c.fetchone()[0]
-            if count > 0:
-                # If there are old players, we need to handle migration
-                # For now, just add the column - old players won't work but new ones will
-                pass
-            
-            # Add tournament_id column
-            c.execute('ALTER TABLE players ADD COLUMN tournament_id INTEGER')
-            # Remove UNIQUE constraint on name (we'll add unique on tournament_id+name later)
-            # SQLite doesn't support dropping constraints easily, so we'll recreate if needed
-            conn.commit()
-        except sqlite3.OperationalError as e:
-            # If it fails, the table might need to be recreated
-            pass
-    
-    # Players table - unique per tournament
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS players (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tournament_id INTEGER NOT NULL,
-            name TEXT NOT NULL,
-            FOREIGN KEY (tournament_id) REFERENCES tournaments(id) ON DELETE CASCADE,
-            UNIQUE(tournament_id, name)
-        )
-    ''')
-    
-    # Tournaments table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS tournaments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            sport_type TEXT NOT NULL,
-            tournament_type TEXT NOT NULL,
-            team_type TEXT NOT NULL,
-            has_consolation INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Teams table - teams belong to a tournament, can have 1 or 2 players
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS teams (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tournament_id INTEGER NOT NULL,
-            player1_id INTEGER NOT NULL,
-            player2_id INTEGER,
-            FOREIGN KEY (tournament_id) REFERENCES tournaments(id) ON DELETE CASCADE,
-            FOREIGN KEY (player1_id) REFERENCES players(id),
-            FOREIGN KEY (player2_id) REFERENCES players(id)
-        )
-    ''')
-    
-    # Poules table - poules within tournaments
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS poules (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tournament_id INTEGER NOT NULL,
-            phase TEXT NOT NULL,
-            name TEXT NOT NULL,
-            FOREIGN KEY (tournament_id) REFERENCES tournaments(id) ON DELETE CASCADE,
-            UNIQUE(tournament_id, phase, name)
-        )
-    ''')
-    
-    # Matches table - matches between teams
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS matches (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tournament_id INTEGER NOT NULL,
-            phase TEXT NOT NULL,
-            poule_id INTEGER,
-            team1_id INTEGER NOT NULL,
-            team2_id INTEGER NOT NULL,
-            team1_score INTEGER,
-            team2_score INTEGER,
-            sets_json TEXT,
-            played_at TIMESTAMP,
-            FOREIGN KEY (tournament_id) REFERENCES tournaments(id) ON DELETE CASCADE,
-            FOREIGN KEY (poule_id) REFERENCES poules(id),
-            FOREIGN KEY (team1_id) REFERENCES teams(id),
-            FOREIGN KEY (team2_id) REFERENCES teams(id)
-        )
-    ''')
-    
-    # Migrate existing matches table if needed (add sets_json column)
+            return method(self, sql, *args)
+        finally:
+            if self._record is not None:
+                self._record.duration += time.perf_counter() - start
+                if self.rowcount > 0:  # Rows changed by INSERT/UPDATE/DELETE
+                    self._record.rows = self.rowcount
+                log.records.append(self._record)
+    
+    def execute(self, sql, *args):
+        return self._run(sqlite3.Cursor.execute, sql, *args)
+    
+    def executemany(self, sql, *args):
+        return self._run(sqlite3.Cursor.executemany, sql, *args)
+    
+    def _fetch(self, method: Callable, *args):
+        start = time.perf_counter()
+        result = method(self, *args)
+        if self._record is not None:
+            self._record.duration += time.perf_counter() - start
+            self._record.rows += len(result) if isinstance(result, list) else int(result is not None)
+        return result
+    
+    def fetchone(self):
+        return self._fetch(sqlite3.Cursor.fetchone)
+    
+    def fetchmany(self, *args):
+        return self._fetch(sqlite3.Cursor.fetchmany, *args)
+    
+    def fetchall(self):
+        return self._fetch(sqlite3.Cursor.fetchall)
+    
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+
+class InstrumentedConnection(PooledConnection):
+    """Pooled connection whose cursors (also those of conn.execute) are instrumented"""
+    
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+    
+    def execute(self, sql, *args):
+        return self.cursor().execute(sql, *args)
+    
+    def executemany(self, sql, *args):
+        return self.cursor().executemany(sql, *args)
+
+
+class ConnectionPool:
+    """
+    Thread-aware pool of long-lived SQLite connections for one database file.
+    A connection is used by one thread at a time: acquire() hands out an idle
+    connection (or opens a new one), release() puts it back for any thread.
+    """
+    
+    def __init__(self, db_name: str, pragmas: Optional[Dict[str, object]] = None,
+                 size: int = POOL_SIZE):
+        self.db_name = db_name
+        self.pragmas = dict(PRAGMAS if pragmas is None else pragmas)
+        self.size = size
+        self._idle: List[PooledConnection] = []
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> PooledConnection:
+        """Open a new connection and apply the configured PRAGMAs"""
+        factory = InstrumentedConnection if _instrumented else PooledConnection
+        conn = sqlite3.connect(self.db_name, factory=factory, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            # Connection setup is not recorded by the query instrumentation
+            sqlite3.Connection.execute(conn, f"PRAGMA {name} = {value}")
+        if _trace_callback is not None:
+            conn.set_trace_callback(_trace_callback)
+        return conn
+    
+    def acquire(self) -> PooledConnection:
+        """Get a connection for exclusive use by the calling thread"""
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._connect()
+            conn.pool = self
+        conn.checked_out = True
+        return conn
+    
+    def release(self, conn: PooledConnection):
+        """Give a connection back; uncommitted work is rolled back"""
+        if conn.in_transaction:
+            conn.rollback()
+        conn.checked_out = False
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.dispose()
+    
+    def close_all(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.dispose()
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Get the connection pool for the current DB_NAME"""
+    pool = _pools.get(DB_NAME)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(DB_NAME)
+            if pool is None:
+                pool = ConnectionPool(DB_NAME)
+                _pools[DB_NAME] = pool
+    return pool
+
+
+def configure_pool(pragmas: Optional[Dict[str, object]] = None, size: Optional[int] = None):
+    """Change PRAGMAs and/or pool size; open connections are closed and reopened lazily"""
+    global PRAGMAS, POOL_SIZE
+    if pragmas is not None:
+        PRAGMAS = {**PRAGMAS, **pragmas}
+    if size is not None:
+        POOL_SIZE = size
+    close_pools()
+
+
+def set_trace_callback(callback: Optional[Callable[[str], None]]):
+    """Trace every SQL statement (with bound values) run on pooled connections; None stops tracing"""
+    global _trace_callback
+    _trace_callback = callback
+    close_pools()  # New connections pick up the callback
+
+
+def set_instrumentation(enabled: bool):
+    """Turn query instrumentation on or off (also via TOURNAMENT_DEBUG_QUERIES=1)"""
+    global _instrumented
+    if enabled != _instrumented:
+        _instrumented = enabled
+        close_pools()  # New connections get the matching factory
+
+
+def instrumentation_enabled() -> bool:
+    """Check if pooled connections record their statements"""
+    return _instrumented
+
+
+def fingerprint(sql: str) -> str:
+    """Normalized statement: literals and IN lists replaced, whitespace collapsed"""
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\b\d+\b", "?", sql)
+    sql = re.sub(r"\(\s*\?(?:\s*,\s*\?)+\s*\)", "(?, ...)", sql)
+    return " ".join(sql.split())
+
+
+def begin_query_log() -> QueryLog:
+    """Start recording the statements of the current thread (e.g. at the top of every rerun)"""
+    _query_logs.log = QueryLog()
+    return _query_logs.log
+
+
+def current_query_log() -> Optional[QueryLog]:
+    """QueryLog of the current thread (None when nothing is recorded)"""
+    return getattr(_query_logs, "log", None)
+
+
+@contextmanager
+def query_log() -> Iterator[QueryLog]:
+    """Record the statements of a block (instrumentation is enabled for it)"""
+    was_enabled = _instrumented
+    previous = current_query_log()
+    set_instrumentation(True)
+    log = begin_query_log()
     try:
-        c.execute("SELECT sets_json FROM matches LIMIT 1")
-    except sqlite3.OperationalError:
-        try:
-            c.execute('ALTER TABLE matches ADD COLUMN sets_json TEXT')
-            conn.commit()
-        except sqlite3.OperationalError:
-            pass  # Column might already exist
+        yield log
+    finally:
+        _query_logs.log = previous
+        set_instrumentation(was_enabled)
+
+
+@contextmanager
+def query_budget(max_queries: int, max_ms: Optional[float] = None) -> Iterator[QueryLog]:
+    """
+    Assert that a block runs at most `max_queries` statements (and optionally
+    spends at most `max_ms` in the database), e.g. in tests:
     
-    conn.commit()
-    conn.close()
+        with query_budget(5):
+            tournament.get_standings("poule")
+    """
+    with query_log() as log:
+        yield log
+    details = "\n".join(f"  {group['count']}x {group['total_ms']:.2f} ms  {group['sql']}" for group in log.summary())
+    if log.count > max_queries:
+        raise AssertionError(f"{log.count} queries, budget is {max_queries}:\n{details}")
+    if max_ms is not None and log.total_ms > max_ms:
+        raise AssertionError(f"{log.total_ms:.2f} ms in queries, budget is {max_ms} ms:\n{details}")
+
+
+def close_pools():
+    """Close all pooled connections (e.g. before deleting or swapping the database file)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
+
+
+def get_connection() -> sqlite3.Connection:
+    """Get a pooled database connection; call close() to hand it back"""
+    return get_pool().acquire()
+
+
+@contextmanager
+def transaction() -> Iterator[sqlite3.Connection]:
+    """
+    Run a block in one write transaction (BEGIN IMMEDIATE) on a pooled connection.
+    Commits when the block succeeds, rolls back when it raises (and then runs the
+    on_rollback() hooks, newest first). Afterwards the read cache of every
+    tournament passed to mark_changed() is invalidated.
+    """
+    conn = get_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        for hook in reversed(conn.rollback_hooks):
+            hook()
+        raise
+    finally:
+        changed, conn.changed_tournaments = conn.changed_tournaments, set()
+        conn.rollback_hooks = []
+        conn.close()
+        if changed:
+            from cache import invalidate
+            for tournament_id in changed:
+                invalidate(tournament_id)
+
 
+def mark_changed(conn: sqlite3.Connection, tournament_id: Optional[int]):
+    """Record that a transaction() writes data of a tournament (cache invalidated when it ends)"""
+    conn.changed_tournaments.add(tournament_id)
+
+
+def on_rollback(conn: sqlite3.Connection, hook: Callable[[], None]):
+    """Run `hook` when the open transaction() rolls back (to undo in-memory changes of objects)"""
+    conn.rollback_hooks.append(hook)
+
+
+def insert_many(conn: sqlite3.Connection, sql: str, rows: Sequence[tuple]) -> List[int]:
+    """
+    Insert many rows with executemany and return their assigned IDs.
+    Must run inside transaction(): the write lock guarantees that the
+    AUTOINCREMENT IDs of one executemany are consecutive.
+    """
+    if not rows:
+        return []
+    conn.executemany(sql, rows)
+    last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    return list(range(last_id - len(rows) + 1, last_id + 1))
+
+
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def init_db():
+    """
+    Bring the database schema up to date.
+    Migrations run once per process and database file; later calls return immediately.
+    """
+    if DB_NAME in _initialized:
+        return
+    
+    from migrations import migrate
+    with _init_lock:
+        if DB_NAME in _initialized:
+            return
+        conn = get_connection()
+        try:
+            migrate(conn)
+        finally:
+            conn.close()
+        _initialized.add(DB_NAME)
@@ -0,0 +1,263 @@
+"""
+Schema migrations - ordered, idempotent steps keyed on PRAGMA user_version
+"""
+import sqlite3
+from typing import Callable, List
+
+# Migration steps in order; step N (1-based) brings the schema to user_version N
+MIGRATIONS: List[Callable[[sqlite3.Connection], None]] = []
+
+
+def migration(step: Callable[[sqlite3.Connection], None]) -> Callable[[sqlite3.Connection], None]:
+    """Register a migration step (decorator); steps run in definition order"""
+    MIGRATIONS.append(step)
+    return step
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    """Get the schema version stored in the database file"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def latest_version() -> int:
+    """Schema version after all migrations have run"""
+    return len(MIGRATIONS)
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Apply all pending migrations, each in its own transaction.
+    Returns immediately when the schema is current. Returns the schema version.
+    """
+    version = get_version(conn)
+    if version >= latest_version():
+        return version
+    
+    while version < latest_version():
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read under the write lock: another process may have migrated meanwhile
+            version = get_version(conn)
+            if version < latest_version():
+                MIGRATIONS[version](conn)
+                version += 1
+                conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return version
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    """Get the column names of a table (empty if the table doesn't exist)"""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _add_column(conn: sqlite3.Connection, table: str, column: str, definition: str):
+    """Add a column unless the table already has it"""
+    if column not in _columns(conn, table):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+@migration
+def _001_base_schema(conn: sqlite3.Connection):
+    """Tables of the original schema, plus the columns older databases are missing"""
+    # Tournaments table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tournaments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            sport_type TEXT NOT NULL,
+            tournament_type TEXT NOT NULL,
+            team_type TEXT NOT NULL,
+            has_consolation INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    _add_column(conn, "tournaments", "team_type", 'TEXT DEFAULT "single"')
+    _add_column(conn, "tournaments", "has_consolation", "INTEGER DEFAULT 0")
+    
+    # Players table - unique per tournament
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS players (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tournament_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            FOREIGN KEY (tournament_id) REFERENCES tournaments(id) ON DELETE CASCADE,
+            UNIQUE(tournament_id, name)
+        )
+    ''')
+    # Old global players table: old players won't work but new ones will
+    _add_column(conn, "players", "tournament_id", "INTEGER")
+    
+    # Teams table - teams belong to a tournament, can have 1 or 2 players
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS teams (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tournament_id INTEGER NOT NULL,
+            player1_id INTEGER NOT NULL,
+            player2_id INTEGER,
+            FOREIGN KEY (tournament_id) REFERENCES tournaments(id) ON DELETE CASCADE,
+            FOREIGN KEY (player1_id) REFERENCES players(id),
+            FOREIGN KEY (player2_id) REFERENCES players(id)
+        )
+    ''')
+    
+    # Poules table - poules within tournaments
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS poules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tournament_id INTEGER NOT NULL,
+            phase TEXT NOT NULL,
+            name TEXT NOT NULL,
+            FOREIGN KEY (tournament_id) REFERENCES tournaments(id) ON DELETE CASCADE,
+            UNIQUE(tournament_id, phase, name)
+        )
+    ''')
+    
+    # Matches table - matches between teams
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS matches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tournament_id INTEGER NOT NULL,
+            phase TEXT NOT NULL,
+            poule_id INTEGER,
+            team1_id INTEGER NOT NULL,
+            team2_id INTEGER NOT NULL,
+            team1_score INTEGER,
+            team2_score INTEGER,
+            sets_json TEXT,
+            played_at TIMESTAMP,
+            FOREIGN KEY (tournament_id) REFERENCES tournaments(id) ON DELETE CASCADE,
+            FOREIGN KEY (poule_id) REFERENCES poules(id),
+            FOREIGN KEY (team1_id) REFERENCES teams(id),
+            FOREIGN KEY (team2_id) REFERENCES teams(id)
+        )
+    ''')
+    _add_column(conn, "matches", "sets_json", "TEXT")
+
+
+@migration
+def _002_lookup_indexes(conn: sqlite3.Connection):
+    """Indexes for the hot lookup paths of the models"""
+    # Match lists per tournament/phase, in the order Match.get_by_tournament returns them
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_matches_tournament_phase
+        ON matches(tournament_id, phase, played_at DESC, id)
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_matches_poule ON matches(poule_id)")
+    # Teams per tournament (index entries are in rowid order, so ORDER BY id is free)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_teams_tournament ON teams(tournament_id)")
+    # Case-insensitive name lookup: Player.find_by_name_in_tournament uses LOWER(name)
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_players_tournament_lower_name
+        ON players(tournament_id, LOWER(name))
+    ''')
+    # Tournament overview ordered by creation date
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tournaments_created_at ON tournaments(created_at)")
+    # poules(tournament_id, phase) lookups use the UNIQUE(tournament_id, phase, name) index
+
+
+@migration
+def _003_standings(conn: sqlite3.Connection):
+    """Incrementally maintained poule standings, backfilled from played poule matches"""
+    # poule_id 0 = no poule (round-robin); kept NOT NULL so the primary key can be upserted
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS standings (
+            tournament_id INTEGER NOT NULL,
+            poule_id INTEGER NOT NULL DEFAULT 0,
+            team_id INTEGER NOT NULL,
+            played INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            losses INTEGER NOT NULL DEFAULT 0,
+            draws INTEGER NOT NULL DEFAULT 0,
+            sets_won INTEGER NOT NULL DEFAULT 0,
+            sets_lost INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (tournament_id, poule_id, team_id),
+            FOREIGN KEY (tournament_id) REFERENCES tournaments(id) ON DELETE CASCADE,
+            FOREIGN KEY (team_id) REFERENCES teams(id)
+        )
+    ''')
+    conn.execute("DELETE FROM standings")
+    conn.execute('''
+        INSERT INTO standings
+        (tournament_id, poule_id, team_id, played, wins, losses, draws, sets_won, sets_lost)
+        SELECT tournament_id, COALESCE(poule_id, 0), team_id, COUNT(*),
+               SUM(own > other), SUM(own < other), SUM(own = other), SUM(own), SUM(other)
+        FROM (
+            SELECT tournament_id, poule_id, team1_id AS team_id,
+                   team1_score AS own, team2_score AS other
+            FROM matches
+            WHERE phase = 'poule' AND team1_score IS NOT NULL AND team2_score IS NOT NULL
+            UNION ALL
+            SELECT tournament_id, poule_id, team2_id, team2_score, team1_score
+            FROM matches
+            WHERE phase = 'poule' AND team1_score IS NOT NULL AND team2_score IS NOT NULL
+        )
+        GROUP BY tournament_id, COALESCE(poule_id, 0), team_id
+    ''')
+
+
+@migration
+def _004_bracket_nodes(conn: sqlite3.Connection):
+    """Bracket tree: one node per knockout pairing, linked to the node its winner advances to"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS bracket_nodes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tournament_id INTEGER NOT NULL,
+            phase TEXT NOT NULL,
+            round INTEGER NOT NULL,
+            slot INTEGER NOT NULL,
+            team1_id INTEGER,
+            team2_id INTEGER,
+            match_id INTEGER UNIQUE,
+            feeder1_node_id INTEGER,
+            feeder2_node_id INTEGER,
+            next_node_id INTEGER,
+            next_slot INTEGER,
+            FOREIGN KEY (tournament_id) REFERENCES tournaments(id) ON DELETE CASCADE,
+            FOREIGN KEY (team1_id) REFERENCES teams(id),
+            FOREIGN KEY (team2_id) REFERENCES teams(id),
+            FOREIGN KEY (match_id) REFERENCES matches(id),
+            UNIQUE(tournament_id, phase, round, slot)
+        )
+    ''')
+
+
+@migration
+def _005_bracket_loser_links(conn: sqlite3.Connection):
+    """Bracket nodes can send their loser to a node of another bracket (consolation)"""
+    _add_column(conn, "bracket_nodes", "loser_next_node_id", "INTEGER")
+    _add_column(conn, "bracket_nodes", "loser_next_slot", "INTEGER")
+
+
+@migration
+def _006_match_sets(conn: sqlite3.Connection):
+    """Set scores in their own table instead of the sets_json column"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS match_sets (
+            match_id INTEGER NOT NULL,
+            set_no INTEGER NOT NULL,
+            score1 INTEGER NOT NULL,
+            score2 INTEGER NOT NULL,
+            PRIMARY KEY (match_id, set_no),
+            FOREIGN KEY (match_id) REFERENCES matches(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        INSERT OR REPLACE INTO match_sets (match_id, set_no, score1, score2)
+        SELECT m.id, CAST(s.key AS INTEGER) + 1,
+               json_extract(s.value, '$[0]'), json_extract(s.value, '$[1]')
+        FROM matches m, json_each(m.sets_json) s
+        WHERE m.sets_json IS NOT NULL AND json_valid(m.sets_json)
+    ''')
+    # Set wins follow from the set rows with an aggregate (same rule as Match._calculate_set_wins)
+    conn.execute('''
+        UPDATE matches
+        SET team1_score = (SELECT SUM(score1 > score2) FROM match_sets WHERE match_id = matches.id),
+            team2_score = (SELECT SUM(score2 > score1) FROM match_sets WHERE match_id = matches.id)
+        WHERE id IN (SELECT match_id FROM match_sets)
+    ''')
+    # sets_json is kept for older databases but no longer read or written
+    conn.execute("UPDATE matches SET sets_json = NULL WHERE sets_json IS NOT NULL")
@@ -5,9 +5,10 @@ Models package
 from .player import Player
 from .team import Team
 from .match import Match, MatchPhase
+from .loader import TournamentGraph
 
 # Tournament imports Match internally - import it lazily or let users import directly
 # from .tournament import Tournament  # Commented out to avoid circular import
 
-__all__ = ['Player', 'Team', 'Match', 'MatchPhase']
+__all__ = ['Player', 'Team', 'Match', 'MatchPhase', 'TournamentGraph']
 
@@ -0,0 +1,206 @@
+"""
+Bracket model - persistent knockout bracket tree.
+Every node is one pairing (round, slot) and knows the node its winner advances to,
+so saving a knockout match moves the winner into the next round in O(1).
+"""
+from __future__ import annotations
+
+import sqlite3
+from typing import Optional, List, Dict, Tuple, Union
+from database import get_connection, insert_many, mark_changed, on_rollback
+from .team import Team
+from .match import Match, MatchPhase
+from .session import lookup, forget
+
+
+class LoserOf:
+    """Bracket entrant that is not known yet: the loser of another bracket node"""
+    
+    def __init__(self, node_id: int):
+        self.node_id = node_id
+    
+    def __repr__(self):
+        return f"LoserOf(node={self.node_id})"
+
+
+# A bracket slot holds a team, a pending loser or nobody (bye)
+Entrant = Union[Team, LoserOf, None]
+
+
+class Bracket:
+    """Creation and winner advancement of the bracket tree of a tournament phase"""
+    
+    @staticmethod
+    def create(conn: sqlite3.Connection, tournament_id: int, phase: MatchPhase,
+               slots: List[Entrant]) -> List[Match]:
+        """
+        Create the bracket tree for seeded slots (power of two, None = bye) inside
+        the caller's transaction. Slots 2i and 2i+1 meet in round 1; an entrant with
+        a bye is placed straight into round 2. LoserOf entrants are linked to the node
+        they come from. Creates the matches whose two teams are already known and
+        returns them.
+        """
+        size = len(slots)
+        if size < 2:
+            return []
+        rounds = size.bit_length() - 1
+        
+        # (round, slot) -> [entrant1, entrant2] for every pairing that will be played
+        pairings: Dict[Tuple[int, int], List[Entrant]] = {
+            (rnd, slot): [None, None] for rnd in range(1, rounds + 1) for slot in range(size >> rnd)
+        }
+        for slot in range(size // 2):
+            team1, team2 = slots[2 * slot], slots[2 * slot + 1]
+            if team1 is not None and team2 is not None:
+                pairings[(1, slot)] = [team1, team2]
+            else:
+                # Bye: no first round pairing, the entrant goes straight to round 2
+                del pairings[(1, slot)]
+                pairings[(2, slot // 2)][slot % 2] = team1 if team1 is not None else team2
+        
+        def team_id(entrant: Entrant) -> Optional[int]:
+            return entrant.id if isinstance(entrant, Team) else None
+        
+        mark_changed(conn, tournament_id)
+        keys = list(pairings)
+        node_ids = dict(zip(keys, insert_many(conn, '''
+            INSERT INTO bracket_nodes (tournament_id, phase, round, slot, team1_id, team2_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(tournament_id, phase.value, rnd, slot,
+               team_id(pairings[(rnd, slot)][0]), team_id(pairings[(rnd, slot)][1]))
+              for rnd, slot in keys])))
+        
+        # Pending losers: the node they come from sends its loser here
+        conn.executemany('UPDATE bracket_nodes SET loser_next_node_id = ?, loser_next_slot = ? WHERE id = ?',
+                         [(node_ids[key], position + 1, entrant.node_id)
+                          for key in keys for position, entrant in enumerate(pairings[key])
+                          if isinstance(entrant, LoserOf)])
+        
+        # Link every node to the node its winner advances to (and back as feeder)
+        links = []
+        feeders: Dict[int, List[Optional[int]]] = {}
+        for (rnd, slot), node_id in node_ids.items():
+            if rnd == rounds:
+                continue
+            next_id = node_ids[(rnd + 1, slot // 2)]
+            links.append((next_id, slot % 2 + 1, node_id))
+            feeders.setdefault(next_id, [None, None])[slot % 2] = node_id
+        conn.executemany('UPDATE bracket_nodes SET next_node_id = ?, next_slot = ? WHERE id = ?', links)
+        conn.executemany('UPDATE bracket_nodes SET feeder1_node_id = ?, feeder2_node_id = ? WHERE id = ?',
+                         [(f[0], f[1], node_id) for node_id, f in feeders.items()])
+        
+        # Matches for the pairings whose teams are known now
+        ready = [key for key in keys if all(isinstance(entrant, Team) for entrant in pairings[key])]
+        matches = [Match(tournament_id=tournament_id, phase=phase,
+                         team1=pairings[key][0], team2=pairings[key][1]) for key in ready]
+        Match.save_many(matches, conn=conn)
+        conn.executemany('UPDATE bracket_nodes SET match_id = ? WHERE id = ?',
+                         [(match.id, node_ids[key]) for match, key in zip(matches, ready)])
+        return matches
+    
+    @staticmethod
+    def advance(conn: sqlite3.Connection, matches: List[Match]):
+        """
+        Move the winners (and losers, when linked) of saved bracket matches into
+        their next node (inside the caller's transaction). A cleared or tied
+        result takes the teams out of the next round again.
+        """
+        for match in matches:
+            row = conn.execute('''
+                SELECT next_node_id, next_slot, loser_next_node_id, loser_next_slot
+                FROM bracket_nodes WHERE match_id = ?
+            ''', (match.id,)).fetchone()
+            if not row:
+                continue
+            if row[0] is not None:
+                Bracket._set_slot(conn, row[0], row[1], match.winner)
+            if row[2] is not None:
+                Bracket._set_slot(conn, row[2], row[3], match.loser)
+    
+    @staticmethod
+    def _set_slot(conn: sqlite3.Connection, node_id: int, slot: int, team: Optional[Team]):
+        """Put a team (or nobody) into a slot of a node and create/update/drop its match"""
+        tournament_id, phase, team1_id, team2_id, match_id = conn.execute('''
+            SELECT tournament_id, phase, team1_id, team2_id, match_id
+            FROM bracket_nodes WHERE id = ?
+        ''', (node_id,)).fetchone()
+        team_ids = [team1_id, team2_id]
+        new_id = team.id if team else None
+        if team_ids[slot - 1] == new_id:
+            return
+        
+        if match_id:
+            score1, score2 = conn.execute('SELECT team1_score, team2_score FROM matches WHERE id = ?',
+                                          (match_id,)).fetchone()
+            if score1 is not None and score2 is not None:
+                raise ValueError("De volgende ronde is al gespeeld; verwijder eerst die uitslag")
+        
+        team_ids[slot - 1] = new_id
+        column = "team1_id" if slot == 1 else "team2_id"
+        conn.execute(f'UPDATE bracket_nodes SET {column} = ? WHERE id = ?', (new_id, node_id))
+        
+        if match_id and new_id is not None:
+            # Other team already known: just swap the team in the waiting match
+            conn.execute(f'UPDATE matches SET {column} = ? WHERE id = ?', (new_id, match_id))
+            loaded = lookup(Match, match_id)
+            if loaded:
+                attribute = "team1" if slot == 1 else "team2"
+                previous = getattr(loaded, attribute)
+                setattr(loaded, attribute, team)
+                on_rollback(conn, lambda: setattr(loaded, attribute, previous))
+        elif match_id:
+            # Team taken out again: the waiting match no longer has two teams
+            conn.execute('UPDATE bracket_nodes SET match_id = NULL WHERE id = ?', (node_id,))
+            conn.execute('DELETE FROM matches WHERE id = ?', (match_id,))
+            forget(Match, match_id)
+        elif None not in team_ids:
+            teams = [team if team_id == new_id else Team.get_by_id(team_id) for team_id in team_ids]
+            match = Match(tournament_id=tournament_id, phase=MatchPhase(phase), team1=teams[0], team2=teams[1])
+            Match.save_many([match], conn=conn)
+            conn.execute('UPDATE bracket_nodes SET match_id = ? WHERE id = ?', (match.id, node_id))
+    
+    @staticmethod
+    def get_first_round_node_ids(conn: sqlite3.Connection, tournament_id: int, phase: MatchPhase) -> List[int]:
+        """IDs of the round 1 nodes of a bracket (pairings actually played), in slot order"""
+        rows = conn.execute('''
+            SELECT id FROM bracket_nodes
+            WHERE tournament_id = ? AND phase = ? AND round = 1
+            ORDER BY slot
+        ''', (tournament_id, phase.value)).fetchall()
+        return [row[0] for row in rows]
+    
+    @staticmethod
+    def get_rounds(tournament_id: int, phase: MatchPhase) -> Dict[int, int]:
+        """Get the round of every bracket match: match_id -> round"""
+        conn = get_connection()
+        c = conn.cursor()
+        c.execute('''
+            SELECT match_id, round FROM bracket_nodes
+            WHERE tournament_id = ? AND phase = ? AND match_id IS NOT NULL
+        ''', (tournament_id, phase.value))
+        rows = c.fetchall()
+        conn.close()
+        return dict(rows)
+    
+    @staticmethod
+    def get_round_count(tournament_id: int, phase: MatchPhase) -> int:
+        """Number of rounds of the bracket (0 if there is no bracket)"""
+        conn = get_connection()
+        c = conn.cursor()
+        c.execute('SELECT MAX(round) FROM bracket_nodes WHERE tournament_id = ? AND phase = ?',
+                  (tournament_id, phase.value))
+        row = c.fetchone()
+        conn.close()
+        return row[0] or 0
+    
+    @staticmethod
+    def round_name(rnd: int, rounds: int) -> str:
+        """Display name of a round (Finale, Halve finale, ...)"""
+        remaining = rounds - rnd
+        if remaining == 0:
+            return "Finale"
+        if remaining == 1:
+            return "Halve finale"
+        if remaining == 2:
+            return "Kwartfinale"
+        return f"Ronde {rnd}"
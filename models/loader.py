@@ -0,0 +1,126 @@
+"""
+Tournament graph loader - hydrates players, teams and matches of a tournament
+with a handful of JOINed queries into one shared object graph
+"""
+from __future__ import annotations
+
+from typing import Optional, List, Dict
+from database import get_connection
+from cache import cached
+from .player import Player
+from .team import Team
+from .match import Match, MatchPhase, SELECT_WITH_SETS_SQL, group_sets
+from .session import lookup, register
+
+
+class TournamentGraph:
+    """Players, teams and matches of one tournament, sharing the same objects"""
+    
+    def __init__(self, tournament_id: int):
+        self.tournament_id = tournament_id
+        self.players: Dict[int, Player] = {}
+        self.teams: Dict[int, Team] = {}  # Ordered by team ID
+        self.matches: List[Match] = []
+    
+    @property
+    def team_list(self) -> List[Team]:
+        """Teams of the tournament, ordered by ID"""
+        return list(self.teams.values())
+    
+    @staticmethod
+    def load(tournament_id: int, phase: Optional[MatchPhase] = None,
+             with_matches: bool = True) -> 'TournamentGraph':
+        """
+        Load the tournament graph: one query for teams joined with their players,
+        one query for the matches (optionally filtered by phase).
+        Both row sets come from the read cache while the tournament is unchanged.
+        Every match references the shared Team objects of the graph.
+        """
+        graph = TournamentGraph(tournament_id)
+        team_rows = _fetch_team_rows(tournament_id)
+        match_rows = _fetch_match_rows(tournament_id, phase.value if phase else None) if with_matches else ()
+        
+        for row in team_rows:
+            team = lookup(Team, row[0])
+            if team is None:
+                player1 = graph._player(row[2], row[3], row[4])
+                player2 = graph._player(row[5], row[6], row[7])
+                team = register(Team(id=row[0], tournament_id=row[1], player1=player1, player2=player2))
+            graph._add_team_players(team)
+            graph.teams[row[0]] = team
+        
+        for row, sets in match_rows:
+            match = lookup(Match, row[0])
+            if match is None:
+                match = register(Match._from_row(row, graph._team(row[4]), graph._team(row[5]), sets))
+            graph.matches.append(match)
+        
+        return graph
+    
+    def _player(self, player_id: Optional[int], tournament_id: Optional[int], name: Optional[str]) -> Optional[Player]:
+        """Get the shared Player for a joined row (None if the team has no such player)"""
+        if player_id is None:
+            return None
+        player = self.players.get(player_id)
+        if player is None:
+            player = register(Player(id=player_id, tournament_id=tournament_id, name=name))
+            self.players[player_id] = player
+        return player
+    
+    def _add_team_players(self, team: Team):
+        """Index the players of an (already loaded) team"""
+        for player in (team.player1, team.player2):
+            if player is not None and player.id is not None:
+                self.players.setdefault(player.id, player)
+    
+    def _team(self, team_id: Optional[int]) -> Optional[Team]:
+        """Get the shared Team for a match row"""
+        if not team_id:
+            return None
+        team = self.teams.get(team_id)
+        if team is None:
+            # Team outside this tournament (inconsistent data) - load it separately
+            team = Team.get_by_id(team_id)
+            if team:
+                self.teams[team_id] = team
+        return team
+
+
+@cached
+def _fetch_team_rows(tournament_id: int) -> tuple:
+    """Teams of a tournament joined with their players"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('''
+        SELECT t.id, t.tournament_id,
+               p1.id, p1.tournament_id, p1.name,
+               p2.id, p2.tournament_id, p2.name
+        FROM teams t
+        LEFT JOIN players p1 ON p1.id = t.player1_id
+        LEFT JOIN players p2 ON p2.id = t.player2_id
+        WHERE t.tournament_id = ?
+        ORDER BY t.id
+    ''', (tournament_id,))
+    rows = tuple(c.fetchall())
+    conn.close()
+    return rows
+
+
+@cached
+def _fetch_match_rows(tournament_id: int, phase: Optional[str]) -> tuple:
+    """(match row, set scores) of a tournament (optionally of one phase), most recently played first"""
+    conn = get_connection()
+    c = conn.cursor()
+    if phase:
+        c.execute(SELECT_WITH_SETS_SQL + '''
+            WHERE m.tournament_id = ? AND m.phase = ?
+            ORDER BY m.played_at DESC, m.id, s.set_no
+        ''', (tournament_id, phase))
+    else:
+        c.execute(SELECT_WITH_SETS_SQL + '''
+            WHERE m.tournament_id = ?
+            ORDER BY m.played_at DESC, m.id, s.set_no
+        ''', (tournament_id,))
+    rows = tuple(group_sets(c.fetchall()))
+    conn.close()
+    return rows
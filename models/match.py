@@ -4,12 +4,13 @@ Match model - matches between teams
 from __future__ import annotations
 
 import sqlite3
-import json
 from datetime import datetime
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Iterable
 from enum import Enum
-from database import get_connection
+from database import get_connection, transaction, insert_many, mark_changed, on_rollback
 from .team import Team
+from .session import lookup, register, forget
+from .standings import StandingsStore
 
 
 class MatchPhase(Enum):
@@ -19,9 +20,61 @@ class MatchPhase(Enum):
     CONSOLATION = "consolation"
 
 
+_INSERT_SQL = '''
+    INSERT INTO matches 
+    (tournament_id, phase, poule_id, team1_id, team2_id, team1_score, team2_score, played_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_UPDATE_SQL = '''
+    UPDATE matches
+    SET tournament_id = ?, phase = ?, poule_id = ?, 
+        team1_id = ?, team2_id = ?, team1_score = ?, team2_score = ?, played_at = ?
+    WHERE id = ?
+'''
+
+# Match columns followed by the set scores: one row per set (LEFT JOIN, so unplayed matches have one row)
+SELECT_WITH_SETS_SQL = '''
+    SELECT m.id, m.tournament_id, m.phase, m.poule_id, m.team1_id, m.team2_id,
+           m.team1_score, m.team2_score, m.played_at, s.score1, s.score2
+    FROM matches m
+    LEFT JOIN match_sets s ON s.match_id = m.id
+'''
+
+
+def group_sets(rows: Iterable[tuple]) -> List[Tuple[tuple, Tuple[Tuple[int, int], ...]]]:
+    """Fold SELECT_WITH_SETS_SQL rows (ordered by match, then set) into (match row, sets) pairs"""
+    grouped = []
+    for row in rows:
+        if not grouped or grouped[-1][0][0] != row[0]:
+            grouped.append((row[:9], []))
+        if row[9] is not None:
+            grouped[-1][1].append((row[9], row[10]))
+    return [(match_row, tuple(sets)) for match_row, sets in grouped]
+
+
+
+def _fetch_standings_values(conn: sqlite3.Connection, match_ids: List[int]) -> List[tuple]:
+    """Stored values of matches as StandingsStore expects them (before they are updated)"""
+    values = []
+    for start in range(0, len(match_ids), 500):
+        chunk = match_ids[start:start + 500]
+        values.extend(conn.execute(f'''
+            SELECT tournament_id, phase, poule_id, team1_id, team2_id, team1_score, team2_score
+            FROM matches
+            WHERE id IN ({", ".join("?" * len(chunk))})
+        ''', chunk).fetchall())
+    return values
+
+
 class Match:
     """Represents a match between two teams"""
     
+    # Slotted: a tournament holds thousands of matches. The set wins and the winning
+    # side are computed once and reset when `sets` or the scores are assigned.
+    __slots__ = ('id', 'tournament_id', 'phase', 'poule_id', 'team1', 'team2', 'played_at',
+                 '_team1_score', '_team2_score', '_sets', '_set_wins', '_outcome')
+    
     def __init__(self, id: Optional[int] = None, tournament_id: Optional[int] = None,
                  phase: MatchPhase = MatchPhase.POULE, poule_id: Optional[int] = None,
                  team1: Optional[Team] = None, team2: Optional[Team] = None,
@@ -34,79 +87,109 @@ class Match:
         self.poule_id = poule_id
         self.team1 = team1
         self.team2 = team2
+        self._outcome = None
         self.team1_score = team1_score  # Number of sets won by team1
         self.team2_score = team2_score  # Number of sets won by team2
         self.sets = sets or []  # List of tuples: [(score1, score2), ...] for each set
         self.played_at = played_at
     
-    def _calculate_set_wins(self):
+    @property
+    def team1_score(self) -> Optional[int]:
+        """Number of sets won by team1"""
+        return self._team1_score
+    
+    @team1_score.setter
+    def team1_score(self, value: Optional[int]):
+        self._team1_score = value
+        self._outcome = None
+    
+    @property
+    def team2_score(self) -> Optional[int]:
+        """Number of sets won by team2"""
+        return self._team2_score
+    
+    @team2_score.setter
+    def team2_score(self, value: Optional[int]):
+        self._team2_score = value
+        self._outcome = None
+    
+    @property
+    def sets(self) -> List[Tuple[int, int]]:
+        """Set scores; assign a new list to change them (the derived results are reset on assignment)"""
+        return self._sets
+    
+    @sets.setter
+    def sets(self, value: Optional[List[Tuple[int, int]]]):
+        self._sets = value if value is not None else []
+        self._set_wins = None
+        self._outcome = None
+    
+    def _calculate_set_wins(self) -> Tuple[int, int]:
         """Calculate number of sets won by each team from sets list"""
-        if not self.sets:
-            return 0, 0
-        
-        wins1, wins2 = 0, 0
-        for score1, score2 in self.sets:
-            if score1 > score2:
-                wins1 += 1
-            elif score2 > score1:
-                wins2 += 1
-        return wins1, wins2
+        if self._set_wins is None:
+            wins1, wins2 = 0, 0
+            for score1, score2 in self._sets:
+                if score1 > score2:
+                    wins1 += 1
+                elif score2 > score1:
+                    wins2 += 1
+            self._set_wins = (wins1, wins2)
+        return self._set_wins
+    
+    @property
+    def set_wins(self) -> Tuple[int, int]:
+        """Sets won by team1 and team2 (0, 0 without sets)"""
+        return self._calculate_set_wins()
+    
+    def _winning_side(self) -> int:
+        """1 or 2 for the winning team, 0 if not played or tie"""
+        if self._outcome is None:
+            if not self.is_played:
+                self._outcome = 0
+            else:
+                # Calculate wins from sets if available, else from the stored scores
+                wins1, wins2 = self._calculate_set_wins() if self._sets else (self._team1_score, self._team2_score)
+                self._outcome = 1 if wins1 > wins2 else 2 if wins2 > wins1 else 0
+        return self._outcome
     
     @property
     def is_played(self) -> bool:
         """Check if match has been played"""
-        if self.sets:
-            return len(self.sets) > 0
-        return self.team1_score is not None and self.team2_score is not None
+        if self._sets:
+            return True
+        return self._team1_score is not None and self._team2_score is not None
     
     @property
     def winner(self) -> Optional[Team]:
         """Get winning team (None if not played or tie)"""
-        if not self.is_played:
-            return None
-        
-        # Calculate wins from sets if available
-        if self.sets:
-            wins1, wins2 = self._calculate_set_wins()
-            if wins1 > wins2:
-                return self.team1
-            elif wins2 > wins1:
-                return self.team2
-            return None  # Tie
-        
-        # Fallback to old method
-        if self.team1_score > self.team2_score:
+        side = self._winning_side()
+        if side == 1:
             return self.team1
-        elif self.team2_score > self.team1_score:
+        elif side == 2:
             return self.team2
-        return None  # Tie
+        return None
     
     @property
     def loser(self) -> Optional[Team]:
         """Get losing team (None if not played or tie)"""
-        if not self.is_played:
-            return None
-        
-        winner = self.winner
-        if winner == self.team1:
+        side = self._winning_side()
+        if side == 1:
             return self.team2
-        elif winner == self.team2:
+        elif side == 2:
             return self.team1
-        return None  # Tie
+        return None
     
-    def save(self) -> int:
-        """Save match to database, returns match ID"""
+    def _validate(self):
+        """Check that the match can be saved"""
         if not self.tournament_id:
             raise ValueError("Tournament ID is required")
         if not self.team1 or not self.team1.id:
             raise ValueError("Team 1 is required")
         if not self.team2 or not self.team2.id:
             raise ValueError("Team 2 is required")
-        
-        conn = get_connection()
-        c = conn.cursor()
-        
-        phase_str = self.phase.value
+    
+    def _db_values(self) -> tuple:
+        """Column values for INSERT/UPDATE (tournament_id .. played_at)"""
         played_at = self.played_at or (datetime.now() if self.is_played else None)
         
         # Calculate set wins from sets if available
@@ -115,104 +198,139 @@ class Match:
             self.team1_score = wins1
             self.team2_score = wins2
         
-        # Serialize sets to JSON
-        sets_json = json.dumps(self.sets) if self.sets else None
-        
-        if self.id:
-            # Update existing
-            c.execute('''
-                UPDATE matches
-                SET tournament_id = ?, phase = ?, poule_id = ?, 
-                    team1_id = ?, team2_id = ?, team1_score = ?, team2_score = ?, sets_json = ?, played_at = ?
-                WHERE id = ?
-            ''', (self.tournament_id, phase_str, self.poule_id, self.team1.id, self.team2.id,
-                  self.team1_score, self.team2_score, sets_json, played_at, self.id))
-            conn.commit()
-            conn.close()
-            return self.id
+        return (self.tournament_id, self.phase.value, self.poule_id, self.team1.id, self.team2.id,
+                self.team1_score, self.team2_score, played_at)
+    
+    @staticmethod
+    def _restore(existing: List['Match'], new_matches: List['Match']):
+        """Reset matches to their stored rows after a rolled back save_many"""
+        for match in new_matches:
+            forget(Match, match.id)
+            match.id = None
+        
+        by_id = {m.id: m for m in existing}
+        match_ids = list(by_id)
+        rows = []
+        conn = get_connection()
+        for start in range(0, len(match_ids), 500):
+            chunk = match_ids[start:start + 500]
+            rows.extend(conn.execute(SELECT_WITH_SETS_SQL + f'''
+                WHERE m.id IN ({", ".join("?" * len(chunk))})
+                ORDER BY m.id, s.set_no
+            ''', chunk).fetchall())
+        conn.close()
+        
+        for row, sets in group_sets(rows):
+            match = by_id[row[0]]
+            team1 = match.team1 if match.team1 and match.team1.id == row[4] else Team.get_by_id(row[4])
+            team2 = match.team2 if match.team2 and match.team2.id == row[5] else Team.get_by_id(row[5])
+            stored = Match._from_row(row, team1, team2, sets)
+            for name in ('tournament_id', 'phase', 'poule_id', 'team1', 'team2',
+                         'team1_score', 'team2_score', 'sets', 'played_at'):
+                setattr(match, name, getattr(stored, name))
+    
+    def save(self) -> int:
+        """Save match to database (standings and bracket are updated incrementally), returns match ID"""
+        return Match.save_many([self])[0]
+    
+    @staticmethod
+    def save_many(matches: List['Match'], conn: Optional[sqlite3.Connection] = None) -> List[int]:
+        """
+        Save many matches in one transaction (executemany for inserts, updates and
+        set scores), apply the standings delta of all changed results at once and advance
+        bracket winners.
+        Pass `conn` to join a transaction opened with database.transaction().
+        When the transaction rolls back, the matches are reset to their stored rows
+        (new matches lose their ID again).
+        Returns the match IDs, in the order of `matches`.
+        """
+        for match in matches:
+            match._validate()
+        if not matches:
+            return []
+        
+        if conn is None:
+            with transaction() as conn:
+                return Match.save_many(matches, conn)
+        
+        for tournament_id in {m.tournament_id for m in matches}:
+            mark_changed(conn, tournament_id)
+        
+        new_matches = list({id(m): m for m in matches if not m.id}.values())
+        existing = list({m.id: m for m in matches if m.id}.values())  # Each row updated once
+        on_rollback(conn, lambda: Match._restore(existing, new_matches))
+        
+        old_values = []
+        if existing:
+            old_values = _fetch_standings_values(conn, [m.id for m in existing])
+            existing_values = [m._db_values() for m in existing]
+            conn.executemany(_UPDATE_SQL, [v + (m.id,) for v, m in zip(existing_values, existing)])
         else:
-            # Insert new
-            c.execute('''
-                INSERT INTO matches 
-                (tournament_id, phase, poule_id, team1_id, team2_id, team1_score, team2_score, sets_json, played_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (self.tournament_id, phase_str, self.poule_id, self.team1.id, self.team2.id,
-                  self.team1_score, self.team2_score, sets_json, played_at))
-            match_id = c.lastrowid
-            conn.commit()
-            conn.close()
-            self.id = match_id
-            return match_id
+            existing_values = []
+        
+        new_values = [m._db_values() for m in new_matches]
+        new_ids = insert_many(conn, _INSERT_SQL, new_values)
+        for match, match_id in zip(new_matches, new_ids):
+            match.id = match_id
+            register(match)
+        
+        # Set scores: replace the match_sets rows of every saved match
+        if existing:
+            conn.executemany('DELETE FROM match_sets WHERE match_id = ?', [(m.id,) for m in existing])
+        set_rows = [(m.id, set_no, score1, score2) for m in existing + new_matches
+                    for set_no, (score1, score2) in enumerate(m.sets, 1)]
+        if set_rows:
+            conn.executemany('INSERT INTO match_sets (match_id, set_no, score1, score2) VALUES (?, ?, ?, ?)',
+                             set_rows)
+        
+        StandingsStore.apply(conn, removed=old_values,
+                             added=[v[:7] for v in existing_values + new_values])
+        
+        # Knockout/consolation results move their winner through the bracket tree
+        bracket_matches = [m for m in existing if m.phase != MatchPhase.POULE]
+        if bracket_matches:
+            from .bracket import Bracket
+            Bracket.advance(conn, bracket_matches)
+        
+        return [m.id for m in matches]
     
     @staticmethod
     def get_by_id(match_id: int) -> Optional['Match']:
         """Get match by ID"""
+        match = lookup(Match, match_id)
+        if match:
+            return match
+        
         conn = get_connection()
         c = conn.cursor()
-        c.execute('''
-            SELECT id, tournament_id, phase, poule_id, team1_id, team2_id, 
-                   team1_score, team2_score, sets_json, played_at
-            FROM matches
-            WHERE id = ?
-        ''', (match_id,))
-        row = c.fetchone()
+        c.execute(SELECT_WITH_SETS_SQL + 'WHERE m.id = ? ORDER BY s.set_no', (match_id,))
+        rows = c.fetchall()
         conn.close()
         
-        if row:
+        if rows:
+            row, sets = group_sets(rows)[0]
             team1 = Team.get_by_id(row[4]) if row[4] else None
             team2 = Team.get_by_id(row[5]) if row[5] else None
-            sets_data = json.loads(row[8]) if row[8] else []
-            sets = [tuple(s) for s in sets_data] if sets_data else []
-            played_at = datetime.fromisoformat(row[9]) if row[9] else None
-            
-            return Match(
-                id=row[0], tournament_id=row[1], phase=MatchPhase(row[2]), poule_id=row[3],
-                team1=team1, team2=team2, team1_score=row[6], team2_score=row[7], 
-                sets=sets, played_at=played_at
-            )
+            return register(Match._from_row(row, team1, team2, sets))
         return None
     
     @staticmethod
     def get_by_tournament(tournament_id: int, phase: Optional[MatchPhase] = None) -> List['Match']:
         """Get all matches for a tournament, optionally filtered by phase"""
-        conn = get_connection()
-        c = conn.cursor()
-        
-        if phase:
-            c.execute('''
-                SELECT id, tournament_id, phase, poule_id, team1_id, team2_id, 
-                       team1_score, team2_score, sets_json, played_at
-                FROM matches
-                WHERE tournament_id = ? AND phase = ?
-                ORDER BY played_at DESC, id
-            ''', (tournament_id, phase.value))
-        else:
-            c.execute('''
-                SELECT id, tournament_id, phase, poule_id, team1_id, team2_id, 
-                       team1_score, team2_score, sets_json, played_at
-                FROM matches
-                WHERE tournament_id = ?
-                ORDER BY played_at DESC, id
-            ''', (tournament_id,))
-        
-        rows = c.fetchall()
-        conn.close()
+        from .loader import TournamentGraph
+        return TournamentGraph.load(tournament_id, phase).matches
+    
+    @staticmethod
+    def _from_row(row: tuple, team1: Optional[Team], team2: Optional[Team],
+                  sets: Iterable[Tuple[int, int]] = ()) -> 'Match':
+        """Build a Match from a matches row, its set scores and its already loaded teams"""
+        played_at = datetime.fromisoformat(row[8]) if row[8] else None
         
-        matches = []
-        for row in rows:
-            team1 = Team.get_by_id(row[4]) if row[4] else None
-            team2 = Team.get_by_id(row[5]) if row[5] else None
-            sets_data = json.loads(row[8]) if row[8] else []
-            sets = [tuple(s) for s in sets_data] if sets_data else []
-            played_at = datetime.fromisoformat(row[9]) if row[9] else None
-            
-            matches.append(Match(
-                id=row[0], tournament_id=row[1], phase=MatchPhase(row[2]), poule_id=row[3],
-                team1=team1, team2=team2, team1_score=row[6], team2_score=row[7], 
-                sets=sets, played_at=played_at
-            ))
-        
-        return matches
+        return Match(
+            id=row[0], tournament_id=row[1], phase=MatchPhase(row[2]), poule_id=row[3],
+            team1=team1, team2=team2, team1_score=row[6], team2_score=row[7], 
+            sets=list(sets), played_at=played_at
+        )
     
     def __repr__(self):
         status = f"{self.team1_score}-{self.team2_score}" if self.is_played else "Not played"
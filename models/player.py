@@ -3,12 +3,16 @@ Player model - players are unique per tournament
 """
 import sqlite3
 from typing import Optional, List
-from database import get_connection
+from database import get_connection, transaction, insert_many, mark_changed
+from cache import cached, invalidate
+from .session import lookup, register
 
 
 class Player:
     """Represents a player (unique per tournament)"""
     
+    __slots__ = ('id', 'tournament_id', 'name')
+    
     def __init__(self, id: Optional[int] = None, tournament_id: Optional[int] = None, name: str = ""):
         self.id = id
         self.tournament_id = tournament_id
@@ -28,6 +32,7 @@ class Player:
                      (self.name, self.tournament_id, self.id))
             conn.commit()
             conn.close()
+            invalidate(self.tournament_id)
             return self.id
         else:
             # Insert new
@@ -36,12 +41,18 @@ class Player:
             player_id = c.lastrowid
             conn.commit()
             conn.close()
+            invalidate(self.tournament_id)
             self.id = player_id
+            register(self)
             return player_id
     
     @staticmethod
     def get_by_id(player_id: int) -> Optional['Player']:
         """Get player by ID"""
+        player = lookup(Player, player_id)
+        if player:
+            return player
+        
         conn = get_connection()
         c = conn.cursor()
         c.execute('SELECT id, tournament_id, name FROM players WHERE id = ?', (player_id,))
@@ -49,20 +60,14 @@ class Player:
         conn.close()
         
         if row:
-            return Player(id=row[0], tournament_id=row[1], name=row[2])
+            return register(Player(id=row[0], tournament_id=row[1], name=row[2]))
         return None
     
     @staticmethod
     def get_by_tournament(tournament_id: int) -> List['Player']:
         """Get all players for a tournament"""
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('SELECT id, tournament_id, name FROM players WHERE tournament_id = ? ORDER BY name', 
-                 (tournament_id,))
-        rows = c.fetchall()
-        conn.close()
-        
-        return [Player(id=row[0], tournament_id=row[1], name=row[2]) for row in rows]
+        return [register(Player(id=row[0], tournament_id=row[1], name=row[2]))
+                for row in _fetch_players(tournament_id)]
     
     @staticmethod
     def find_by_name_in_tournament(tournament_id: int, name: str) -> Optional['Player']:
@@ -75,7 +80,7 @@ class Player:
         conn.close()
         
         if row:
-            return Player(id=row[0], tournament_id=row[1], name=row[2])
+            return register(Player(id=row[0], tournament_id=row[1], name=row[2]))
         return None
     
     @staticmethod
@@ -89,6 +94,52 @@ class Player:
         player.save()
         return player
     
+    @staticmethod
+    def bulk_create_in_tournament(tournament_id: int, names: List[str]) -> List['Player']:
+        """
+        Create-or-get many players in one transaction (case-insensitive on name).
+        Returns one Player per name, in the order of `names`.
+        """
+        if not tournament_id:
+            raise ValueError("Tournament ID is required")
+        if not names:
+            return []
+        
+        with transaction() as conn:
+            mark_changed(conn, tournament_id)
+            rows = conn.execute('SELECT id, tournament_id, name FROM players WHERE tournament_id = ?',
+                                (tournament_id,)).fetchall()
+            by_name = {row[2].lower(): register(Player(id=row[0], tournament_id=row[1], name=row[2]))
+                       for row in rows}
+            
+            new_players = []
+            for name in names:
+                if name.lower() not in by_name:
+                    player = Player(tournament_id=tournament_id, name=name)
+                    by_name[name.lower()] = player
+                    new_players.append(player)
+            
+            new_ids = insert_many(conn, 'INSERT INTO players (tournament_id, name) VALUES (?, ?)',
+                                  [(tournament_id, p.name) for p in new_players])
+        
+        for player, player_id in zip(new_players, new_ids):
+            player.id = player_id
+            register(player)
+        
+        return [by_name[name.lower()] for name in names]
+    
     def __repr__(self):
         return f"Player(id={self.id}, tournament_id={self.tournament_id}, name='{self.name}')"
 
+
+
+@cached
+def _fetch_players(tournament_id: int) -> tuple:
+    """Player rows of a tournament, ordered by name"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('SELECT id, tournament_id, name FROM players WHERE tournament_id = ? ORDER BY name', 
+             (tournament_id,))
+    rows = tuple(c.fetchall())
+    conn.close()
+    return rows
@@ -0,0 +1,86 @@
+"""
+Session - per-request identity map so every Player, Team and Match row
+is materialized once and shared by everything that loads it
+"""
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, Tuple, Iterator
+
+
+class Session:
+    """Identity map of loaded model objects, keyed by (class, id)"""
+    
+    def __init__(self):
+        self._objects: Dict[Tuple[type, int], object] = {}
+    
+    def get(self, cls: type, obj_id: Optional[int]):
+        """Get the loaded instance for a row, or None if not loaded yet"""
+        if obj_id is None:
+            return None
+        return self._objects.get((cls, obj_id))
+    
+    def add(self, obj):
+        """Register an instance; returns the instance already mapped to its row, if any"""
+        if obj is None or obj.id is None:
+            return obj
+        return self._objects.setdefault((type(obj), obj.id), obj)
+    
+    def remove(self, cls: type, obj_id: Optional[int]):
+        """Forget the instance of one row (e.g. after the row is deleted)"""
+        self._objects.pop((cls, obj_id), None)
+    
+    def clear(self):
+        """Forget all loaded instances"""
+        self._objects.clear()
+    
+    def __len__(self):
+        return len(self._objects)
+
+
+_local = threading.local()
+
+
+def current_session() -> Optional[Session]:
+    """Get the session of the current thread (None if no session is active)"""
+    return getattr(_local, "session", None)
+
+
+def begin_session() -> Session:
+    """Start a fresh session for the current thread (e.g. at the top of every Streamlit rerun)"""
+    _local.session = Session()
+    return _local.session
+
+
+def end_session():
+    """Drop the session of the current thread"""
+    _local.session = None
+
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """Run a block with its own session, restoring the previous one afterwards"""
+    previous = current_session()
+    session = begin_session()
+    try:
+        yield session
+    finally:
+        _local.session = previous
+
+
+def lookup(cls: type, obj_id: Optional[int]):
+    """Get an already loaded instance from the active session (None without session)"""
+    session = current_session()
+    return session.get(cls, obj_id) if session is not None else None
+
+
+def register(obj):
+    """Register an instance in the active session; returns the shared instance"""
+    session = current_session()
+    return session.add(obj) if session is not None else obj
+
+
+def forget(cls: type, obj_id: Optional[int]):
+    """Drop the instance of a row from the active session (no-op without session)"""
+    session = current_session()
+    if session is not None:
+        session.remove(cls, obj_id)
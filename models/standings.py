@@ -0,0 +1,120 @@
+"""
+Standings store - poule standings kept up to date incrementally.
+Ranking is done by the shared engine in utils.standings.
+Every saved match result applies its delta to the affected teams only,
+so reading the standings is a single indexed (and cached) query.
+"""
+import sqlite3
+from typing import Optional, List, Dict, Tuple, Iterable
+from database import get_connection
+from cache import cached
+
+# Match values as stored: (tournament_id, phase, poule_id, team1_id, team2_id, team1_score, team2_score)
+MatchValues = Tuple[int, str, Optional[int], int, int, Optional[int], Optional[int]]
+
+# Standings key: (tournament_id, poule_id, team_id) - poule_id 0 = no poule (round-robin)
+StandingsKey = Tuple[int, int, int]
+
+STAT_COLUMNS = ("played", "wins", "losses", "draws", "sets_won", "sets_lost")
+
+
+class StandingsStore:
+    """Reads and incremental updates of the `standings` table"""
+    
+    @staticmethod
+    def contributions(values: MatchValues) -> List[Tuple[StandingsKey, Tuple[int, ...]]]:
+        """Stats one match adds to both teams (nothing unless it is a played poule match)"""
+        tournament_id, phase, poule_id, team1_id, team2_id, score1, score2 = values
+        if phase != "poule" or score1 is None or score2 is None:
+            return []
+        poule_key = poule_id or 0
+        return [
+            ((tournament_id, poule_key, team1_id),
+             (1, int(score1 > score2), int(score1 < score2), int(score1 == score2), score1, score2)),
+            ((tournament_id, poule_key, team2_id),
+             (1, int(score2 > score1), int(score2 < score1), int(score1 == score2), score2, score1)),
+        ]
+    
+    @staticmethod
+    def apply(conn: sqlite3.Connection, removed: Iterable[MatchValues], added: Iterable[MatchValues]):
+        """
+        Apply the delta of changed matches: subtract their old values, add their new ones.
+        Runs inside the caller's transaction; one upsert per affected team.
+        """
+        deltas: Dict[StandingsKey, List[int]] = {}
+        for values, sign in [(v, -1) for v in removed] + [(v, 1) for v in added]:
+            for key, stats in StandingsStore.contributions(values):
+                delta = deltas.setdefault(key, [0] * len(STAT_COLUMNS))
+                for i, stat in enumerate(stats):
+                    delta[i] += sign * stat
+        
+        rows = [key + tuple(delta) for key, delta in deltas.items() if any(delta)]
+        if rows:
+            conn.executemany('''
+                INSERT INTO standings
+                (tournament_id, poule_id, team_id, played, wins, losses, draws, sets_won, sets_lost)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(tournament_id, poule_id, team_id) DO UPDATE SET
+                    played = played + excluded.played,
+                    wins = wins + excluded.wins,
+                    losses = losses + excluded.losses,
+                    draws = draws + excluded.draws,
+                    sets_won = sets_won + excluded.sets_won,
+                    sets_lost = sets_lost + excluded.sets_lost
+            ''', rows)
+    
+    @staticmethod
+    @cached
+    def get_poule_rows(tournament_id: int, poule_id: Optional[int] = None) -> Tuple[tuple, ...]:
+        """
+        Get standings of the teams that played in each poule (rank them with utils.standings).
+        Returns: (poule_id, poule_name, team_id, team_name, played, wins, losses, draws, sets_won, sets_lost)
+        """
+        conn = get_connection()
+        c = conn.cursor()
+        c.execute(f'''
+            SELECT s.poule_id, po.name, s.team_id, p1.name, p2.name,
+                   s.played, s.wins, s.losses, s.draws, s.sets_won, s.sets_lost
+            FROM standings s
+            JOIN poules po ON po.id = s.poule_id
+            JOIN teams t ON t.id = s.team_id
+            LEFT JOIN players p1 ON p1.id = t.player1_id
+            LEFT JOIN players p2 ON p2.id = t.player2_id
+            WHERE s.tournament_id = ? AND s.played > 0 {"AND s.poule_id = ?" if poule_id else ""}
+            ORDER BY s.poule_id, s.team_id
+        ''', (tournament_id, poule_id) if poule_id else (tournament_id,))
+        rows = c.fetchall()
+        conn.close()
+        return tuple(row[:3] + (_team_name(row[3], row[4]),) + row[5:] for row in rows)
+    
+    @staticmethod
+    @cached
+    def get_team_rows(tournament_id: int) -> Tuple[tuple, ...]:
+        """
+        Get standings of every team in a tournament without poules (round-robin).
+        Returns: (team_id, team_name, played, wins, losses, draws, sets_won, sets_lost)
+        """
+        conn = get_connection()
+        c = conn.cursor()
+        c.execute('''
+            SELECT t.id, p1.name, p2.name,
+                   COALESCE(s.played, 0), COALESCE(s.wins, 0), COALESCE(s.losses, 0),
+                   COALESCE(s.draws, 0), COALESCE(s.sets_won, 0), COALESCE(s.sets_lost, 0)
+            FROM teams t
+            LEFT JOIN standings s
+                   ON s.tournament_id = t.tournament_id AND s.poule_id = 0 AND s.team_id = t.id
+            LEFT JOIN players p1 ON p1.id = t.player1_id
+            LEFT JOIN players p2 ON p2.id = t.player2_id
+            WHERE t.tournament_id = ?
+            ORDER BY t.id
+        ''', (tournament_id,))
+        rows = c.fetchall()
+        conn.close()
+        return tuple((row[0], _team_name(row[1], row[2])) + row[3:] for row in rows)
+
+
+def _team_name(player1_name: Optional[str], player2_name: Optional[str]) -> str:
+    """Display name of a team from its player names (same as Team.display_name)"""
+    if player2_name is None:
+        return player1_name or ""
+    return " / ".join(name for name in (player1_name, player2_name) if name)
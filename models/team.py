@@ -3,13 +3,17 @@ Team model - teams belong to tournaments, can have 1 or 2 players
 """
 import sqlite3
 from typing import Optional, List
-from database import get_connection
+from database import get_connection, transaction, insert_many, mark_changed
+from cache import invalidate
 from .player import Player
+from .session import lookup, register
 
 
 class Team:
     """Represents a team in a tournament (1 or 2 players)"""
     
+    __slots__ = ('id', 'tournament_id', 'player1', 'player2')
+    
     def __init__(self, id: Optional[int] = None, tournament_id: Optional[int] = None, 
                  player1: Optional[Player] = None, player2: Optional[Player] = None):
         self.id = id
@@ -36,8 +40,8 @@ class Team:
             names = [p.name for p in [self.player1, self.player2] if p]
             return " / ".join(names)
     
-    def save(self) -> int:
-        """Save team to database, returns team ID"""
+    def _validate(self):
+        """Check that the team can be saved"""
         if not self.tournament_id:
             raise ValueError("Tournament ID is required")
         if not self.player1:
@@ -46,6 +50,10 @@ class Team:
             raise ValueError("Player 1 must be saved first")
         if self.player2 and self.player2.id is None:
             raise ValueError("Player 2 must be saved first")
+    
+    def save(self) -> int:
+        """Save team to database, returns team ID"""
+        self._validate()
         
         conn = get_connection()
         c = conn.cursor()
@@ -61,6 +69,7 @@ class Team:
             ''', (self.tournament_id, self.player1.id, player2_id, self.id))
             conn.commit()
             conn.close()
+            invalidate(self.tournament_id)
             return self.id
         else:
             # Insert new
@@ -71,49 +80,90 @@ class Team:
             team_id = c.lastrowid
             conn.commit()
             conn.close()
+            invalidate(self.tournament_id)
             self.id = team_id
+            register(self)
             return team_id
     
+    @staticmethod
+    def save_many(teams: List['Team'], conn: Optional[sqlite3.Connection] = None) -> List[int]:
+        """
+        Save many teams in one transaction (executemany for inserts and updates).
+        Pass `conn` to join a transaction opened with database.transaction().
+        Returns the team IDs, in the order of `teams`.
+        """
+        for team in teams:
+            team._validate()
+        if not teams:
+            return []
+        
+        if conn is None:
+            with transaction() as conn:
+                return Team.save_many(teams, conn)
+        
+        for tournament_id in {t.tournament_id for t in teams}:
+            mark_changed(conn, tournament_id)
+        
+        new_teams = list({id(t): t for t in teams if not t.id}.values())
+        existing = [t for t in teams if t.id]
+        
+        if existing:
+            conn.executemany('''
+                UPDATE teams 
+                SET tournament_id = ?, player1_id = ?, player2_id = ?
+                WHERE id = ?
+            ''', [(t.tournament_id, t.player1.id, t.player2.id if t.player2 else None, t.id)
+                  for t in existing])
+        
+        new_ids = insert_many(conn, '''
+            INSERT INTO teams (tournament_id, player1_id, player2_id)
+            VALUES (?, ?, ?)
+        ''', [(t.tournament_id, t.player1.id, t.player2.id if t.player2 else None) for t in new_teams])
+        for team, team_id in zip(new_teams, new_ids):
+            team.id = team_id
+            register(team)
+        
+        return [t.id for t in teams]
+    
     @staticmethod
     def get_by_id(team_id: int) -> Optional['Team']:
         """Get team by ID"""
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('''
-            SELECT id, tournament_id, player1_id, player2_id
-            FROM teams
-            WHERE id = ?
-        ''', (team_id,))
-        row = c.fetchone()
-        conn.close()
-        
-        if row:
-            player1 = Player.get_by_id(row[2]) if row[2] else None
-            player2 = Player.get_by_id(row[3]) if row[3] else None
-            return Team(id=row[0], tournament_id=row[1], player1=player1, player2=player2)
-        return None
+        teams = Team.get_by_ids([team_id])
+        return teams[0] if teams else None
     
     @staticmethod
-    def get_by_tournament(tournament_id: int) -> List['Team']:
-        """Get all teams for a tournament"""
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('''
-            SELECT id, tournament_id, player1_id, player2_id
-            FROM teams
-            WHERE tournament_id = ?
-            ORDER BY id
-        ''', (tournament_id,))
-        rows = c.fetchall()
-        conn.close()
+    def get_by_ids(team_ids: List[int]) -> List['Team']:
+        """Get teams by ID (teams and players JOINed, 500 IDs per query), in the given order; unknown IDs are skipped"""
+        teams = {team_id: lookup(Team, team_id) for team_id in team_ids}
+        missing = [team_id for team_id, team in teams.items() if team is None]
         
-        teams = []
-        for row in rows:
-            player1 = Player.get_by_id(row[2]) if row[2] else None
-            player2 = Player.get_by_id(row[3]) if row[3] else None
-            teams.append(Team(id=row[0], tournament_id=row[1], player1=player1, player2=player2))
+        if missing:
+            conn = get_connection()
+            c = conn.cursor()
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                c.execute(f'''
+                    SELECT t.id, t.tournament_id,
+                           p1.id, p1.tournament_id, p1.name,
+                           p2.id, p2.tournament_id, p2.name
+                    FROM teams t
+                    LEFT JOIN players p1 ON p1.id = t.player1_id
+                    LEFT JOIN players p2 ON p2.id = t.player2_id
+                    WHERE t.id IN ({", ".join("?" * len(chunk))})
+                ''', chunk)
+                for row in c.fetchall():
+                    player1 = register(Player(id=row[2], tournament_id=row[3], name=row[4])) if row[2] is not None else None
+                    player2 = register(Player(id=row[5], tournament_id=row[6], name=row[7])) if row[5] is not None else None
+                    teams[row[0]] = register(Team(id=row[0], tournament_id=row[1], player1=player1, player2=player2))
+            conn.close()
         
-        return teams
+        return [team for team in teams.values() if team is not None]
+    
+    @staticmethod
+    def get_by_tournament(tournament_id: int) -> List['Team']:
+        """Get all teams for a tournament (teams and players in one JOINed query)"""
+        from .loader import TournamentGraph
+        return TournamentGraph.load(tournament_id, with_matches=False).team_list
     
     def __repr__(self):
         return f"Team(id={self.id}, tournament_id={self.tournament_id}, players={self.display_name})"
@@ -5,8 +5,11 @@ from __future__ import annotations
 
 import sqlite3
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from datetime import date
+from typing import Optional, List, Tuple
 from database import get_connection
+from cache import cached, invalidate, ALL_TOURNAMENTS
+from tournament_types import get_tournament_class
 from .team import Team
 
 
@@ -40,6 +43,8 @@ class Tournament(ABC):
                   1 if self.has_consolation else 0, self.id))
             conn.commit()
             conn.close()
+            invalidate(self.id)
+            invalidate(ALL_TOURNAMENTS)
             return self.id
         else:
             # Insert new
@@ -51,71 +56,60 @@ class Tournament(ABC):
             tournament_id = c.lastrowid
             conn.commit()
             conn.close()
+            invalidate(tournament_id)
+            invalidate(ALL_TOURNAMENTS)
             self.id = tournament_id
             return tournament_id
     
     @staticmethod
     def get_by_id(tournament_id: int) -> Optional['Tournament']:
         """Get tournament by ID - returns appropriate subclass instance"""
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('''
-            SELECT id, name, sport_type, tournament_type, team_type, has_consolation, created_at
-            FROM tournaments
-            WHERE id = ?
-        ''', (tournament_id,))
-        row = c.fetchone()
-        conn.close()
-        
+        row = _fetch_tournament(tournament_id)
         if not row:
             return None
-        
-        # Import here to avoid circular imports
-        from tournament_types.round_robin import RoundRobinTournament
-        from tournament_types.default_tournament import DefaultTournament
-        
-        tournament_type = row[3]
-        has_consolation = bool(row[5])
-        
-        if tournament_type == "round_robin":
-            return RoundRobinTournament(id=row[0], name=row[1], sport_type=row[2], 
-                                      tournament_type=row[3], team_type=row[4],
-                                      has_consolation=has_consolation, created_at=row[6])
-        elif tournament_type == "default_tournament":
-            return DefaultTournament(id=row[0], name=row[1], sport_type=row[2], 
-                                   tournament_type=row[3], team_type=row[4],
-                                   has_consolation=has_consolation, created_at=row[6])
-        else:
-            # Fallback to base Tournament if type not recognized
-            return Tournament(id=row[0], name=row[1], sport_type=row[2], 
-                            tournament_type=row[3], team_type=row[4],
-                            has_consolation=has_consolation, created_at=row[6])
+        return Tournament._from_row(row)
     
     @staticmethod
-    def get_all() -> List['Tournament']:
-        """Get all tournaments"""
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute('''
-            SELECT id, name, sport_type, tournament_type, team_type, has_consolation, created_at
-            FROM tournaments
-            ORDER BY created_at DESC
-        ''')
-        rows = c.fetchall()
-        conn.close()
+    def get_all(sport_type: Optional[str] = None, tournament_type: Optional[str] = None,
+                created_from: Optional[date] = None, created_to: Optional[date] = None,
+                after: Optional[Tuple[str, int]] = None, limit: Optional[int] = None) -> List['Tournament']:
+        """
+        Get all tournaments, newest first, in one query.
         
-        tournaments = []
-        for row in rows:
-            tournament = Tournament.get_by_id(row[0])
-            if tournament:
-                tournaments.append(tournament)
-        return tournaments
+        Args:
+            sport_type: Only tournaments of this sport
+            tournament_type: Only tournaments of this type
+            created_from: Only tournaments created on or after this day
+            created_to: Only tournaments created on or before this day
+            after: `page_key` of the last tournament of the previous page
+            limit: Maximum number of tournaments (page size)
+        """
+        rows = _fetch_tournament_rows(ALL_TOURNAMENTS, sport_type, tournament_type,
+                                      created_from.isoformat() if created_from else None,
+                                      created_to.isoformat() if created_to else None,
+                                      tuple(after) if after else None, limit)
+        return [Tournament._from_row(row) for row in rows]
+    
+    @property
+    def page_key(self) -> Tuple[str, int]:
+        """Position in the get_all order, pass as `after` to get the next page"""
+        return (self.created_at, self.id)
+    
+    @staticmethod
+    def _from_row(row: tuple) -> 'Tournament':
+        """Build the subclass instance registered for the row's tournament_type"""
+        # Fallback to base Tournament if type not recognized
+        tournament_class = get_tournament_class(row[3]) or Tournament
+        return tournament_class(id=row[0], name=row[1], sport_type=row[2],
+                                tournament_type=row[3], team_type=row[4],
+                                has_consolation=bool(row[5]), created_at=row[6])
     
     def get_teams(self) -> List[Team]:
         """Get all teams in this tournament"""
         if not self.id:
             return []
-        return Team.get_by_tournament(self.id)
+        from .loader import TournamentGraph
+        return TournamentGraph.load(self.id, with_matches=False).team_list
     
     def add_team(self, team: Team) -> int:
         """Add a team to this tournament"""
@@ -124,6 +118,10 @@ class Tournament(ABC):
         team.tournament_id = self.id
         return team.save()
     
+    def has_matches(self) -> bool:
+        """Check if matches have been generated for this tournament"""
+        return bool(self.id) and _fetch_has_matches(self.id)
+    
     def get_matches(self, phase: Optional[str] = None):
         """Get all matches for this tournament, optionally filtered by phase"""
         if not self.id:
@@ -151,13 +149,14 @@ class Tournament(ABC):
         pass
     
     @abstractmethod
-    def get_standings(self, phase: Optional[str] = None):
+    def get_standings(self, phase: Optional[str] = None, poule_id: Optional[int] = None):
         """
         Get standings for this tournament.
         Must be implemented by subclasses.
         
         Args:
             phase: Optional phase to get standings for
+            poule_id: Optional poule to limit the standings to
         
         Returns:
             Standings data (format depends on tournament type)
@@ -167,3 +166,72 @@ class Tournament(ABC):
     def __repr__(self):
         return f"Tournament(id={self.id}, name='{self.name}', type='{self.tournament_type}')"
 
+
+
+@cached
+def _fetch_tournament(tournament_id: int) -> Optional[tuple]:
+    """Row of one tournament"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('''
+        SELECT id, name, sport_type, tournament_type, team_type, has_consolation, created_at
+        FROM tournaments
+        WHERE id = ?
+    ''', (tournament_id,))
+    row = c.fetchone()
+    conn.close()
+    return row
+
+
+@cached
+def _fetch_has_matches(tournament_id: int) -> bool:
+    """Whether a tournament has any matches"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('SELECT EXISTS(SELECT 1 FROM matches WHERE tournament_id = ?)', (tournament_id,))
+    has_matches = bool(c.fetchone()[0])
+    conn.close()
+    return has_matches
+
+
+@cached
+def _fetch_tournament_rows(all_tournaments: None, sport_type: Optional[str], tournament_type: Optional[str],
+                           created_from: Optional[str], created_to: Optional[str],
+                           after: Optional[Tuple[str, int]], limit: Optional[int]) -> tuple:
+    """Rows of the tournaments matching the filters, newest first (keyed on ALL_TOURNAMENTS)"""
+    conditions = []
+    params = []
+    if sport_type:
+        conditions.append('sport_type = ?')
+        params.append(sport_type)
+    if tournament_type:
+        conditions.append('tournament_type = ?')
+        params.append(tournament_type)
+    if created_from:
+        conditions.append('created_at >= ?')
+        params.append(created_from)
+    if created_to:
+        conditions.append("created_at < date(?, '+1 day')")
+        params.append(created_to)
+    if after:
+        # Keyset pagination: continue below the last row of the previous page
+        conditions.append('(created_at, id) < (?, ?)')
+        params.extend(after)
+    
+    sql = '''
+        SELECT id, name, sport_type, tournament_type, team_type, has_consolation, created_at
+        FROM tournaments
+    '''
+    if conditions:
+        sql += 'WHERE ' + ' AND '.join(conditions) + '\n'
+    sql += 'ORDER BY created_at DESC, id DESC'
+    if limit:
+        sql += ' LIMIT ?'
+        params.append(limit)
+    
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(sql, params)
+    rows = tuple(c.fetchall())
+    conn.close()
+    return rows
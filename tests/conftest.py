@@ -0,0 +1,55 @@
+"""
+Shared fixtures - seeded tournaments of fixed size on a throwaway database,
+and a query/wall-time budget check that starts from cold reads
+"""
+import time
+from contextlib import contextmanager
+
+import pytest
+
+import cache
+from database import query_budget
+from models.session import session_scope
+from benchmarks.synthetic import throwaway_database, create_tournament, play_matches
+# The standings engine imports numpy and pandas on first use; import them once
+# here so that one-off cost does not count against the first wall-time budget
+import utils.standings  # noqa: F401
+
+NUM_TEAMS = 32
+
+
+@pytest.fixture
+def db():
+    """Fresh database file, session and read cache for one test"""
+    with throwaway_database() as path, session_scope():
+        cache.clear()
+        yield path
+
+
+@pytest.fixture
+def played_poules(db):
+    """Default tournament (with consolation) whose poule matches are all played"""
+    tournament = create_tournament(NUM_TEAMS, has_consolation=True)
+    tournament.generate_matches()
+    play_matches(tournament.get_matches("poule"))
+    return tournament
+
+
+@pytest.fixture
+def budget():
+    """
+    Context manager asserting at most `max_queries` statements and `max_ms`
+    wall time (which bounds the time spent in queries as well), measured with
+    an empty read cache and identity map (as on the first rerun after a write).
+    The test's own session is restored afterwards.
+    """
+    @contextmanager
+    def check(max_queries: int, max_ms: float):
+        cache.clear()
+        start = time.perf_counter()
+        with session_scope(), query_budget(max_queries, max_ms=max_ms) as log:
+            yield log
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        assert elapsed_ms <= max_ms, f"took {elapsed_ms:.1f} ms, budget is {max_ms} ms"
+    
+    return check
@@ -0,0 +1,76 @@
+"""
+App navigation: only the active view is rendered, but the selections of the
+other views (phase, filters, page, list mode) are kept when switching back
+"""
+import os
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.synthetic import create_tournament, play_matches
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def _widget(widgets, prefix: str):
+    return next(w for w in widgets if w.key and w.key.startswith(prefix))
+
+
+def _switch_away_and_back(at: AppTest, view: str):
+    """Visit every other tournament view and the new-tournament view, then return to `view`"""
+    for other in ["teams", "standings", "settings"]:
+        if other != view:
+            _widget(at.radio, "view_").set_value(other).run()
+    at.radio(key="current_tab").set_value("new").run()
+    at.radio(key="current_tab").set_value("overview").run()
+    _widget(at.radio, "view_").set_value(view).run()
+
+
+def test_selections_kept_across_views(db):
+    tournament = create_tournament(40, has_consolation=True)
+    tournament.generate_matches()
+    play_matches(tournament.get_matches("poule"))
+    tournament.generate_knockout_matches()
+    create_tournament(4)  # Listed first, so the selection has to be kept too
+    
+    at = AppTest.from_file(APP, default_timeout=60).run()
+    at.selectbox[0].set_value(tournament.id).run()
+    _widget(at.radio, "view_").set_value("standings").run()
+    _widget(at.selectbox, "phase_select_").set_value("knockout").run()
+    _widget(at.radio, "view_").set_value("matches").run()
+    _widget(at.selectbox, "match_phase_").set_value("knockout").run()
+    _widget(at.selectbox, "match_phase_").set_value("poule").run()
+    _widget(at.selectbox, "match_status_").set_value("Gespeeld").run()
+    _widget(at.selectbox, "match_mode_").set_value("Compact").run()
+    _widget(at.number_input, "match_page_").set_value(2).run()
+    
+    _switch_away_and_back(at, "matches")
+    assert not at.exception
+    assert at.selectbox[0].value == tournament.id
+    assert _widget(at.selectbox, "match_phase_").value == "poule"
+    assert _widget(at.selectbox, "match_status_").value == "Gespeeld"
+    assert _widget(at.selectbox, "match_mode_").value == "Compact"
+    assert _widget(at.number_input, "match_page_").value == 2
+    
+    _widget(at.selectbox, "match_phase_").set_value("knockout").run()
+    _widget(at.selectbox, "match_team_").set_value(tournament.get_matches("knockout")[0].team1.id).run()
+    _switch_away_and_back(at, "matches")
+    assert _widget(at.selectbox, "match_phase_").value == "knockout"
+    assert _widget(at.selectbox, "match_team_").value == tournament.get_matches("knockout")[0].team1.id
+    
+    _widget(at.radio, "view_").set_value("standings").run()
+    assert _widget(at.selectbox, "phase_select_").value == "knockout"
+
+
+def test_poule_filter_kept(db):
+    tournament = create_tournament(40)
+    tournament.generate_matches()
+    
+    at = AppTest.from_file(APP, default_timeout=60).run()
+    _widget(at.radio, "view_").set_value("matches").run()
+    _widget(at.selectbox, "match_poule_").select_index(2).run()  # Index 0 is "Alle"
+    selected = _widget(at.selectbox, "match_poule_").value
+    assert selected is not None
+    
+    _switch_away_and_back(at, "matches")
+    assert not at.exception
+    assert _widget(at.selectbox, "match_poule_").value == selected
@@ -0,0 +1,121 @@
+"""
+Query budgets of the model and tournament entry points: the number of
+statements may not grow with the number of rows (no per-row lookups), and the
+wall time has a generous upper bound (far above CI noise) that only catches a
+slowdown of an order of magnitude
+"""
+import pytest
+
+from database import get_connection, query_budget
+from models.match import Match
+from models.tournament import Tournament
+from benchmarks.synthetic import create_tournament, play_matches
+
+
+def test_get_all(db, budget):
+    for _ in range(20):
+        create_tournament(4)
+    
+    with budget(max_queries=1, max_ms=500):
+        tournaments = Tournament.get_all()
+    assert len(tournaments) == 20
+
+
+def test_get_all_pages(db, budget):
+    for num_teams in range(4, 16):
+        create_tournament(num_teams, sport_type="Tafeltennis" if num_teams % 2 else "Badminton")
+    everything = [t.id for t in Tournament.get_all(sport_type="Badminton")]
+    
+    pages = []
+    after = None
+    with budget(max_queries=4, max_ms=500):
+        while True:
+            page = Tournament.get_all(sport_type="Badminton", after=after, limit=2)
+            if not page:
+                break
+            pages.append([t.id for t in page])
+            after = page[-1].page_key
+    assert sum(pages, []) == everything
+    assert len(everything) == 6 and everything == sorted(everything, reverse=True)
+
+
+def test_match_get_by_tournament(played_poules, budget):
+    with budget(max_queries=2, max_ms=500):
+        matches = Match.get_by_tournament(played_poules.id)
+    assert len(matches) == 48
+    assert all(match.team1 and match.team2 for match in matches)
+
+
+def test_poule_standings(played_poules, budget):
+    with budget(max_queries=1, max_ms=500):
+        standings = played_poules.get_standings("poule")
+    assert len(standings) == 32
+
+
+def test_knockout_standings(played_poules, budget):
+    played_poules.generate_knockout_matches()
+    
+    with budget(max_queries=4, max_ms=500):
+        standings = played_poules.get_standings("knockout")
+    assert len(standings) == 8
+
+
+@pytest.mark.parametrize("num_teams, first_round, nodes", [
+    # 16 teams: 8 qualifiers; consolation 4 losers + 8 eliminated in a bracket of 16
+    # (4 byes: the first round has 4 nodes, then 4 + 2 + 1)
+    (16, {"knockout": 4, "consolation": 4}, {"knockout": 7, "consolation": 11}),
+    # 64 teams: 32 qualifiers; consolation 16 losers + 32 eliminated in a bracket of 64
+    # (16 byes: the first round has 16 nodes, then 16 + 8 + 4 + 2 + 1)
+    (64, {"knockout": 16, "consolation": 16}, {"knockout": 31, "consolation": 47}),
+])
+def test_generate_knockout_matches(db, budget, num_teams, first_round, nodes):
+    tournament = create_tournament(num_teams, has_consolation=True)
+    tournament.generate_matches()
+    poule_match_ids = {match.id for match in tournament.get_matches("poule")}
+    play_matches(tournament.get_matches("poule"))
+    
+    with budget(max_queries=22, max_ms=1000):
+        matches = tournament.generate_knockout_matches()
+    
+    created = {phase: sum(match.phase.value == phase for match in matches) for phase in first_round}
+    assert created == first_round
+    assert len(matches) == sum(first_round.values())
+    assert _count(tournament.id, "SELECT phase, COUNT(*) FROM bracket_nodes WHERE tournament_id = ? GROUP BY phase") == nodes
+    # The poule matches are untouched: same rows, all still poule matches
+    assert _count(tournament.id, "SELECT phase, COUNT(*) FROM matches WHERE tournament_id = ? GROUP BY phase") == {
+        "poule": len(poule_match_ids), **first_round}
+    assert {match.id for match in tournament.get_matches("poule")} == poule_match_ids
+    assert all(match.is_played for match in tournament.get_matches("poule"))
+
+
+@pytest.mark.parametrize("num_teams", [8, 24])
+def test_round_robin_generate_matches(db, budget, num_teams):
+    tournament = create_tournament(num_teams, tournament_type="round_robin")
+    
+    with budget(max_queries=4, max_ms=1000):
+        matches = tournament.generate_matches()
+    assert len(matches) == num_teams * (num_teams - 1) // 2
+
+
+def test_query_budget_time_limit(db):
+    # A recursive count of 200k rows takes milliseconds, far over a 0.01 ms budget
+    slow_sql = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 200000) SELECT COUNT(*) FROM n"
+    with pytest.raises(AssertionError, match="ms in queries, budget is 0.01 ms"):
+        with query_budget(max_queries=1, max_ms=0.01):
+            conn = get_connection()
+            conn.execute(slow_sql).fetchone()
+            conn.close()
+    
+    with query_budget(max_queries=1, max_ms=10000) as log:
+        conn = get_connection()
+        conn.execute(slow_sql).fetchone()
+        conn.close()
+    assert log.count == 1 and log.total_ms > 0
+
+
+def _count(tournament_id: int, sql: str) -> dict:
+    """{phase: count} from a grouped COUNT query"""
+    conn = get_connection()
+    counts = dict(conn.execute(sql, (tournament_id,)).fetchall())
+    conn.close()
+    return counts
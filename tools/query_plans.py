@@ -0,0 +1,121 @@
+"""
+Query plan check - runs every model query against a seeded throwaway database,
+EXPLAINs each distinct statement and fails when one does a full table scan.
+
+Usage: python -m tools.query_plans
+"""
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from datetime import date
+from typing import List, Tuple, Dict
+
+import database
+
+# "SCAN <table>" without "USING ... INDEX" is a full table scan
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+CHECKED_STATEMENTS = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+def exercise_models():
+    """Call every model and utility read/write path once on a small tournament"""
+    from models.player import Player
+    from models.team import Team
+    from models.match import Match, MatchPhase
+    from models.tournament import Tournament
+    from tournament_types.default_tournament import DefaultTournament
+    from tournament_types.round_robin import RoundRobinTournament
+    from utils.poules import get_poules_by_tournament, get_or_create_poule
+    from utils.bracket_generator import get_qualified_teams_from_poules
+    
+    tournament = DefaultTournament(name="Plan Check", sport_type="Tafeltennis", has_consolation=True)
+    tournament.save()
+    players = Player.bulk_create_in_tournament(tournament.id, [f"Speler {i}" for i in range(10)])
+    Player.create_or_get_in_tournament(tournament.id, "speler 1")
+    Player.create_or_get_in_tournament(tournament.id, "Nieuwe Speler")
+    Player.get_by_id(players[0].id)
+    Player.get_by_tournament(tournament.id)
+    Team.save_many([Team(tournament_id=tournament.id, player1=p) for p in players])
+    
+    tournament.generate_matches()
+    for match in tournament.get_matches("poule"):
+        match.sets = [(11, 7), (9, 11), (11, 5)]
+        match.save()
+    Match.get_by_id(match.id)
+    Team.get_by_id(match.team1.id)
+    tournament.get_standings("poule")
+    get_poules_by_tournament(tournament.id)
+    get_or_create_poule(tournament.id, MatchPhase.POULE.value, "A")
+    get_qualified_teams_from_poules(tournament.id)
+    for match in tournament.generate_knockout_matches():
+        match.team1_score, match.team2_score = 3, 1
+        match.save()
+    tournament.get_standings("knockout")
+    tournament.get_standings("consolation")
+    
+    round_robin = RoundRobinTournament(name="Plan Check RR", sport_type="Padel")
+    round_robin.save()
+    rr_players = Player.bulk_create_in_tournament(round_robin.id, ["A", "B", "C", "D"])
+    for player in rr_players:
+        Team(tournament_id=round_robin.id, player1=player).save()
+    for match in round_robin.generate_matches():
+        match.team1_score, match.team2_score = 2, 1
+        match.save()
+    round_robin.get_standings()
+    
+    Tournament.get_by_id(tournament.id)
+    Tournament.get_all()
+    first_page = Tournament.get_all(sport_type="Tafeltennis", tournament_type="default_tournament", limit=1)
+    Tournament.get_all(created_from=date.today(), created_to=date.today(), after=first_page[0].page_key)
+
+
+def explain(db_path: str, statements: List[str]) -> List[Tuple[str, List[str]]]:
+    """Get the query plan details of every statement"""
+    conn = sqlite3.connect(db_path)
+    plans = []
+    for sql in statements:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+        plans.append((sql, [row[3] for row in rows]))
+    conn.close()
+    return plans
+
+
+def find_full_scans(plans: List[Tuple[str, List[str]]]) -> List[Tuple[str, List[str]]]:
+    """Statements whose plan contains a full table scan"""
+    return [(sql, details) for sql, details in plans
+            if any(FULL_SCAN.match(detail) for detail in details)]
+
+
+def main() -> int:
+    statements: Dict[str, None] = {}  # Ordered set of distinct statements
+    
+    def trace(sql: str):
+        if sql.lstrip().upper().startswith(CHECKED_STATEMENTS):
+            statements.setdefault(" ".join(sql.split()))
+    
+    with tempfile.TemporaryDirectory(prefix="query_plans_") as directory:
+        db_path = os.path.join(directory, "query_plans.db")
+        database.DB_NAME = db_path
+        database.init_db()
+        database.set_trace_callback(trace)
+        try:
+            exercise_models()
+            plans = explain(db_path, list(statements))
+        finally:
+            database.set_trace_callback(None)
+            # The pooled connections hold the file open until they are closed
+            database.close_pools()
+    
+    full_scans = find_full_scans(plans)
+    for sql, details in full_scans:
+        print(f"FULL SCAN: {sql}")
+        for detail in details:
+            print(f"    {detail}")
+    print(f"{len(plans)} statements checked, {len(full_scans)} with a full table scan")
+    return 1 if full_scans else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,42 @@
 """
-Tournament types package
+Tournament types package - registry of the Tournament subclasses by tournament_type.
+A type's module is only imported when that type is first used.
 """
-from .round_robin import RoundRobinTournament
-from .default_tournament import DefaultTournament
+import importlib
+from typing import Dict, Optional
 
-__all__ = ['RoundRobinTournament', 'DefaultTournament']
+# tournament_type -> (label in the creation form, module that registers the class)
+TOURNAMENT_TYPES = {
+    "default_tournament": ("Default Tournament", "tournament_types.default_tournament"),
+    "round_robin": ("Vriendschappelijk (Round-Robin)", "tournament_types.round_robin"),
+}
 
+# Class names re-exported from the package, imported on first access
+_EXPORTS = {"DefaultTournament": "default_tournament", "RoundRobinTournament": "round_robin"}
+
+_classes: Dict[str, type] = {}
+
+
+def register_tournament_type(tournament_type: str):
+    """Class decorator: register a Tournament subclass for `tournament_type`"""
+    def register(cls: type) -> type:
+        _classes[tournament_type] = cls
+        return cls
+    return register
+
+
+def get_tournament_class(tournament_type: str) -> Optional[type]:
+    """Tournament subclass of a tournament_type (None if unknown), imports its module on first use"""
+    if tournament_type not in _classes and tournament_type in TOURNAMENT_TYPES:
+        importlib.import_module(TOURNAMENT_TYPES[tournament_type][1])
+    return _classes.get(tournament_type)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        return get_tournament_class(_EXPORTS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ['TOURNAMENT_TYPES', 'register_tournament_type', 'get_tournament_class',
+           'RoundRobinTournament', 'DefaultTournament']
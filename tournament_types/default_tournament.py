@@ -2,16 +2,26 @@
 Default Tournament - Clubkampioenschap Tafeltennis
 Poules (4 per poule, remainder 3) -> Knockout -> Optional Consolation
 """
-import pandas as pd
-from typing import List, Optional
+from __future__ import annotations
+
+from typing import Optional, TYPE_CHECKING
+from database import transaction
 from models.tournament import Tournament
+from tournament_types import register_tournament_type
 from models.team import Team
 from models.match import Match, MatchPhase
-from utils.poules import get_or_create_poule, generate_poule_names
+from models.standings import StandingsStore
+from models.bracket import Bracket, LoserOf
+from utils.poules import get_or_create_poules, generate_poule_names
 from utils.poule_distribution import distribute_teams_into_poules
-from utils.bracket_generator import get_qualified_teams_from_poules, generate_knockout_bracket
+
+# pandas (and utils.standings, which uses it) is imported on first use: it is
+# the slowest import of the app and most reruns do not need it
+if TYPE_CHECKING:
+    import pandas as pd
 
 
+@register_tournament_type("default_tournament")
 class DefaultTournament(Tournament):
     """
     Default Tournament (Clubkampioenschap):
@@ -44,36 +54,38 @@ class DefaultTournament(Tournament):
         poule_distribution = distribute_teams_into_poules(len(teams), teams_per_poule)
         poule_names = generate_poule_names(len(poule_distribution))
         
-        # Create poules and generate matches within each poule
-        for poule_idx, poule_teams in enumerate(poule_distribution):
-            poule_name = poule_names[poule_idx]
-            poule_id = get_or_create_poule(self.id, MatchPhase.POULE.value, poule_name)
+        # Create poules and all their matches in one transaction
+        with transaction() as conn:
+            poule_ids = get_or_create_poules(self.id, MatchPhase.POULE.value, poule_names, conn=conn)
+            
+            for poule_id, poule_teams in zip(poule_ids, poule_distribution):
+                # Generate round-robin matches within this poule
+                for i in range(len(poule_teams)):
+                    for j in range(i + 1, len(poule_teams)):
+                        team1 = teams[poule_teams[i]]
+                        team2 = teams[poule_teams[j]]
+                        
+                        matches.append(Match(
+                            tournament_id=self.id,
+                            phase=MatchPhase.POULE,
+                            poule_id=poule_id,
+                            team1=team1,
+                            team2=team2
+                        ))
             
-            # Generate round-robin matches within this poule
-            for i in range(len(poule_teams)):
-                for j in range(i + 1, len(poule_teams)):
-                    team1 = teams[poule_teams[i]]
-                    team2 = teams[poule_teams[j]]
-                    
-                    match = Match(
-                        tournament_id=self.id,
-                        phase=MatchPhase.POULE,
-                        poule_id=poule_id,
-                        team1=team1,
-                        team2=team2
-                    )
-                    match.save()
-                    matches.append(match)
+            Match.save_many(matches, conn=conn)
         
         return matches
     
-    def get_standings(self, phase: Optional[str] = None) -> pd.DataFrame:
-        """Get standings for a specific phase (poule, knockout, or consolation)"""
+    def get_standings(self, phase: Optional[str] = None, poule_id: Optional[int] = None) -> pd.DataFrame:
+        """Get standings for a specific phase (poule, knockout, or consolation), optionally of one poule"""
+        import pandas as pd
+        
         if not self.id:
             return pd.DataFrame()
         
         if phase == "poule" or phase is None:
-            return self._get_poule_standings()
+            return self._get_poule_standings(poule_id)
         elif phase == "knockout":
             return self._get_knockout_standings()
         elif phase == "consolation":
@@ -81,84 +93,14 @@ class DefaultTournament(Tournament):
         else:
             return pd.DataFrame()
     
-    def _get_poule_standings(self) -> pd.DataFrame:
-        """Get standings per poule"""
-        teams = self.get_teams()
-        matches = [m for m in self.get_matches("poule") if m.is_played]
-        
-        # Get all poules
-        from utils.poules import get_poules_by_tournament
-        poules = get_poules_by_tournament(self.id, MatchPhase.POULE.value)
-        
-        # Initialize stats per poule
-        poule_stats = {}
-        for poule_id, poule_name in poules:
-            poule_stats[poule_id] = {}
-            # Get teams in this poule from matches
-            for match in matches:
-                if match.poule_id == poule_id:
-                    if match.team1.id not in poule_stats[poule_id]:
-                        poule_stats[poule_id][match.team1.id] = {
-                            'name': match.team1.display_name,
-                            'wins': 0, 'losses': 0, 'points_for': 0, 'points_against': 0
-                        }
-                    if match.team2.id not in poule_stats[poule_id]:
-                        poule_stats[poule_id][match.team2.id] = {
-                            'name': match.team2.display_name,
-                            'wins': 0, 'losses': 0, 'points_for': 0, 'points_against': 0
-                        }
-        
-        # Calculate stats from matches
-        for match in matches:
-            if match.poule_id not in poule_stats:
-                continue
-            
-            stats = poule_stats[match.poule_id]
-            
-            if match.team1.id in stats:
-                stats[match.team1.id]['points_for'] += match.team1_score or 0
-                stats[match.team1.id]['points_against'] += match.team2_score or 0
-                if match.winner == match.team1:
-                    stats[match.team1.id]['wins'] += 1
-                elif match.loser == match.team1:
-                    stats[match.team1.id]['losses'] += 1
-            
-            if match.team2.id in stats:
-                stats[match.team2.id]['points_for'] += match.team2_score or 0
-                stats[match.team2.id]['points_against'] += match.team1_score or 0
-                if match.winner == match.team2:
-                    stats[match.team2.id]['wins'] += 1
-                elif match.loser == match.team2:
-                    stats[match.team2.id]['losses'] += 1
-        
-        # Combine all poule standings
-        all_standings = []
-        for poule_id, poule_name in poules:
-            if poule_id not in poule_stats or not poule_stats[poule_id]:
-                continue
-            
-            standings_data = []
-            for team_id, stat in poule_stats[poule_id].items():
-                standings_data.append({
-                    'Poule': poule_name,
-                    'Team': stat['name'],
-                    'Gewonnen': stat['wins'],
-                    'Verloren': stat['losses'],
-                    'Punten Voor': stat['points_for'],
-                    'Punten Tegen': stat['points_against'],
-                    'Saldo': stat['points_for'] - stat['points_against']
-                })
-            
-            # Sort by wins, then by saldo
-            standings_data.sort(key=lambda x: (x['Gewonnen'], x['Saldo']), reverse=True)
-            all_standings.extend(standings_data)
-        
-        df = pd.DataFrame(all_standings)
-        if not df.empty:
-            df.reset_index(drop=True, inplace=True)
-            df.index = df.index + 1
-        
-        return df
+    def _get_poule_standings(self, poule_id: Optional[int] = None) -> pd.DataFrame:
+        """Get standings per poule (from the incrementally maintained standings store)"""
+        import pandas as pd
+        from utils.standings import STAT_COLUMNS, rank_standings, standings_frame
+        
+        rows = StandingsStore.get_poule_rows(self.id, poule_id)
+        standings = pd.DataFrame(rows, columns=['poule_id', 'poule_name', 'team_id', 'team_name'] + STAT_COLUMNS)
+        return standings_frame(rank_standings(standings), with_poule=True)
     
     def all_poule_matches_played(self) -> bool:
         """Check if all poule matches have been played"""
@@ -170,6 +112,8 @@ class DefaultTournament(Tournament):
     def generate_knockout_matches(self):
         """
         Generate knockout bracket matches based on poule results.
+        With has_consolation the consolation bracket is created in the same
+        transaction: first round knockout losers plus the non-qualified poule teams.
         Only works if all poule matches are played.
         """
         if not self.id:
@@ -178,45 +122,55 @@ class DefaultTournament(Tournament):
         if not self.all_poule_matches_played():
             raise ValueError("All poule matches must be played before generating knockout bracket")
         
-        # Get qualified teams (top 2 per poule)
-        qualified = get_qualified_teams_from_poules(self.id, top_n=2)
+        from utils.bracket_generator import (get_poule_rankings, get_qualified_teams_from_poules,
+                                             get_eliminated_teams_from_poules, seed_bracket)
         
-        # Generate bracket
-        matches = generate_knockout_bracket(self.id, qualified)
-        
-        # Save matches to database
-        for match in matches:
-            match.save()
+        # Get qualified teams (top 2 per poule)
+        rankings = get_poule_rankings(self.id)
+        qualified = get_qualified_teams_from_poules(self.id, top_n=2, rankings=rankings)
+        
+        # Seed the bracket and create the whole tree plus the first matches;
+        # later rounds are filled as winners are saved
+        slots = seed_bracket(qualified)
+        with transaction() as conn:
+            matches = Bracket.create(conn, self.id, MatchPhase.KNOCKOUT,
+                                     [slot[0] if slot else None for slot in slots])
+            
+            if self.has_consolation:
+                # Knockout losers (stronger, seeded first) join as their matches are played
+                losers = [(LoserOf(node_id), None, None)
+                          for node_id in Bracket.get_first_round_node_ids(conn, self.id, MatchPhase.KNOCKOUT)]
+                entrants = losers + get_eliminated_teams_from_poules(self.id, top_n=2, rankings=rankings)
+                if len(entrants) >= 2:
+                    matches += Bracket.create(conn, self.id, MatchPhase.CONSOLATION,
+                                              [slot[0] if slot else None for slot in seed_bracket(entrants)])
         
         return matches
     
     def _get_knockout_standings(self) -> pd.DataFrame:
-        """Get knockout phase matches and results"""
-        matches = self.get_matches("knockout")
-        if not matches:
-            return pd.DataFrame()
-        
-        match_data = []
-        for match in matches:
-            match_data.append({
-                'Team 1': match.team1.display_name if match.team1 else '?',
-                'Score 1': match.team1_score if match.is_played else '-',
-                'Score 2': match.team2_score if match.is_played else '-',
-                'Team 2': match.team2.display_name if match.team2 else '?',
-                'Status': 'Gespeeld' if match.is_played else 'Niet gespeeld'
-            })
-        
-        return pd.DataFrame(match_data)
+        """Get knockout phase matches and results, per round"""
+        return self._get_bracket_standings(MatchPhase.KNOCKOUT)
     
     def _get_consolation_standings(self) -> pd.DataFrame:
-        """Get consolation phase matches and results"""
-        matches = self.get_matches("consolation")
+        """Get consolation phase matches and results, per round"""
+        return self._get_bracket_standings(MatchPhase.CONSOLATION)
+    
+    def _get_bracket_standings(self, phase: MatchPhase) -> pd.DataFrame:
+        """Matches and results of a bracket phase, ordered by round"""
+        import pandas as pd
+        
+        matches = self.get_matches(phase.value)
         if not matches:
             return pd.DataFrame()
         
+        rounds = Bracket.get_rounds(self.id, phase)
+        round_count = Bracket.get_round_count(self.id, phase)
+        matches.sort(key=lambda m: (rounds.get(m.id, 0), m.id))
+        
         match_data = []
         for match in matches:
             match_data.append({
+                'Ronde': Bracket.round_name(rounds[match.id], round_count) if match.id in rounds else '-',
                 'Team 1': match.team1.display_name if match.team1 else '?',
                 'Score 1': match.team1_score if match.is_played else '-',
                 'Score 2': match.team2_score if match.is_played else '-',
@@ -225,4 +179,3 @@ class DefaultTournament(Tournament):
             })
         
         return pd.DataFrame(match_data)
-
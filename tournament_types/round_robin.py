@@ -1,13 +1,20 @@
 """
 Round Robin Tournament - everyone plays everyone (friendly tournament)
 """
-import pandas as pd
-from typing import List, Optional
+from __future__ import annotations
+
+from typing import Optional, TYPE_CHECKING
 from models.tournament import Tournament
-from models.team import Team
+from tournament_types import register_tournament_type
 from models.match import Match, MatchPhase
+from models.standings import StandingsStore
+
+# pandas is imported on first use (see default_tournament)
+if TYPE_CHECKING:
+    import pandas as pd
 
 
+@register_tournament_type("round_robin")
 class RoundRobinTournament(Tournament):
     """Round-robin tournament: everyone plays against everyone"""
     
@@ -38,72 +45,21 @@ class RoundRobinTournament(Tournament):
                     team1=teams[i],
                     team2=teams[j]
                 )
-                match.save()
                 matches.append(match)
         
+        Match.save_many(matches)
         return matches
     
-    def get_standings(self, phase: Optional[str] = None) -> pd.DataFrame:
-        """Get standings for round-robin tournament"""
+    def get_standings(self, phase: Optional[str] = None, poule_id: Optional[int] = None) -> pd.DataFrame:
+        """Get standings for round-robin tournament (one table, there are no poules)"""
+        import pandas as pd
+        from utils.standings import STAT_COLUMNS, rank_standings, standings_frame
+        
         if not self.id:
             return pd.DataFrame()
         
-        teams = self.get_teams()
-        matches = self.get_matches(phase="poule")
-        
-        # Initialize stats for each team
-        stats = {team.id: {
-            'name': team.display_name,
-            'wins': 0,
-            'losses': 0,
-            'draws': 0,
-            'points_for': 0,
-            'points_against': 0
-        } for team in teams}
-        
-        # Calculate stats from matches
-        for match in matches:
-            if not match.is_played:
-                continue
-            
-            if match.team1.id in stats:
-                stats[match.team1.id]['points_for'] += match.team1_score or 0
-                stats[match.team1.id]['points_against'] += match.team2_score or 0
-                if match.winner == match.team1:
-                    stats[match.team1.id]['wins'] += 1
-                elif match.loser == match.team1:
-                    stats[match.team1.id]['losses'] += 1
-                else:
-                    stats[match.team1.id]['draws'] += 1
-            
-            if match.team2.id in stats:
-                stats[match.team2.id]['points_for'] += match.team2_score or 0
-                stats[match.team2.id]['points_against'] += match.team1_score or 0
-                if match.winner == match.team2:
-                    stats[match.team2.id]['wins'] += 1
-                elif match.loser == match.team2:
-                    stats[match.team2.id]['losses'] += 1
-                else:
-                    stats[match.team2.id]['draws'] += 1
-        
-        # Convert to DataFrame
-        standings_data = []
-        for team_id, stat in stats.items():
-            standings_data.append({
-                'Team': stat['name'],
-                'Gewonnen': stat['wins'],
-                'Verloren': stat['losses'],
-                'Gelijk': stat['draws'],
-                'Punten Voor': stat['points_for'],
-                'Punten Tegen': stat['points_against'],
-                'Saldo': stat['points_for'] - stat['points_against']
-            })
-        
-        df = pd.DataFrame(standings_data)
-        if not df.empty:
-            df = df.sort_values(['Gewonnen', 'Saldo'], ascending=[False, False])
-            df.reset_index(drop=True, inplace=True)
-            df.index = df.index + 1
-        
-        return df
+        # Standings are maintained incrementally on every saved match
+        rows = StandingsStore.get_team_rows(self.id)
+        standings = pd.DataFrame(rows, columns=['team_id', 'team_name'] + STAT_COLUMNS)
+        return standings_frame(rank_standings(standings), with_draws=True)
 
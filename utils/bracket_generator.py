@@ -3,23 +3,46 @@ Bracket generation utilities for knockout phase
 """
 from __future__ import annotations
 
-from typing import List, Tuple, Dict, Optional
-from collections import defaultdict
+from bisect import bisect_right
+from typing import List, Tuple, Optional, Union, TYPE_CHECKING
 from models.team import Team
 from models.match import Match, MatchPhase
-from database import get_connection
+
+# utils.standings (numpy/pandas) is imported on first use, like in the tournament types
+if TYPE_CHECKING:
+    from utils.standings import MatchTable
 
 
 class TeamStats:
     """Statistics for a team in a poule"""
+    
+    __slots__ = ('team', 'played', 'wins', 'losses', 'draws', 'sets_won', 'sets_lost',
+                 'points_for', 'points_against')
+    
     def __init__(self, team: Team):
         self.team = team
+        self.played = 0
         self.wins = 0  # Aantal gewonnen matches
         self.losses = 0
+        self.draws = 0
         self.sets_won = 0  # Aantal gewonnen sets
         self.sets_lost = 0
-        self.points_for = 0  # Totaal punten voor (later toe te voegen)
-        self.points_against = 0  # Totaal punten tegen (later toe te voegen)
+        self.points_for = 0  # Totaal punten voor (som van de setscores)
+        self.points_against = 0  # Totaal punten tegen
+    
+    @staticmethod
+    def from_standings_row(team: Team, row) -> 'TeamStats':
+        """Build TeamStats from a row of the standings engine"""
+        stats = TeamStats(team)
+        stats.played = int(row.played)
+        stats.wins = int(row.wins)
+        stats.losses = int(row.losses)
+        stats.draws = int(row.draws)
+        stats.sets_won = int(row.sets_won)
+        stats.sets_lost = int(row.sets_lost)
+        stats.points_for = int(row.points_for)
+        stats.points_against = int(row.points_against)
+        return stats
     
     @property
     def sets_balance(self) -> int:
@@ -31,87 +54,74 @@ class TeamStats:
         """Punten saldo"""
         return self.points_for - self.points_against
     
+    @property
+    def ranking_key(self) -> tuple:
+        """Ranking key shared with the standings engine (higher is better)"""
+        from utils.standings import ranking_key
+        return ranking_key(self.wins, self.sets_won, self.sets_lost)
+    
     def __lt__(self, other):
-        """Compare teams for ranking: wins > sets_won > points_balance"""
-        if self.wins != other.wins:
-            return self.wins < other.wins
-        if self.sets_balance != other.sets_balance:
-            return self.sets_balance < other.sets_balance
-        return self.points_balance < other.points_balance
+        """Compare teams for ranking: wins > sets balance > sets won"""
+        return self.ranking_key < other.ranking_key
     
     def __repr__(self):
         return f"TeamStats({self.team.display_name}, W:{self.wins}, Sets:{self.sets_balance})"
 
 
-def calculate_poule_standings(teams: List[Team], matches: List['Match']) -> List[Tuple[Team, TeamStats]]:
+def calculate_poule_standings(teams: List[Team],
+                              matches: Union[MatchTable, List['Match']]) -> List[Tuple[Team, TeamStats]]:
     """
-    Calculate standings for teams in a poule based on matches.
-    Ranking: 1. Wins, 2. Sets balance, 3. Points balance
+    Calculate standings for teams in a poule based on matches (a MatchTable,
+    e.g. MatchTable.load, or Match objects).
+    Ranking (standings engine): 1. Wins, 2. Sets balance, 3. Sets won
     """
-    stats_dict: Dict[int, TeamStats] = {team.id: TeamStats(team) for team in teams}
+    from utils.standings import MatchTable, compute_standings
     
-    for match in matches:
-        if not match.is_played:
-            continue
-        
-        # Update stats for team1
-        if match.team1.id in stats_dict:
-            stats = stats_dict[match.team1.id]
-            stats.sets_won += match.team1_score or 0
-            stats.sets_lost += match.team2_score or 0
-            if match.winner == match.team1:
-                stats.wins += 1
-            elif match.loser == match.team1:
-                stats.losses += 1
-        
-        # Update stats for team2
-        if match.team2.id in stats_dict:
-            stats = stats_dict[match.team2.id]
-            stats.sets_won += match.team2_score or 0
-            stats.sets_lost += match.team1_score or 0
-            if match.winner == match.team2:
-                stats.wins += 1
-            elif match.loser == match.team2:
-                stats.losses += 1
-    
-    # Sort by ranking criteria (reversed for descending)
-    standings = [(team, stats_dict[team.id]) for team in teams if team.id in stats_dict]
-    standings.sort(key=lambda x: x[1], reverse=True)
+    teams_by_id = {team.id: team for team in teams}
+    if not isinstance(matches, MatchTable):
+        matches = MatchTable.from_matches(matches)
+    # All matches count as one poule; only the given teams are ranked
+    standings = compute_standings(matches.in_one_poule(), team_ids=list(teams_by_id))
     
-    return standings
+    return [(teams_by_id[row.team_id], TeamStats.from_standings_row(teams_by_id[row.team_id], row))
+            for row in standings.itertuples() if row.team_id in teams_by_id]
 
 
-def get_qualified_teams_from_poules(tournament_id: int, top_n: int = 2) -> List[Tuple[Team, str, TeamStats]]:
+def get_poule_rankings(tournament_id: int) -> List[Tuple[int, str, tuple, int]]:
     """
-    Get top N teams from each poule.
-    Returns: List of (Team, poule_name, TeamStats) tuples, sorted by ranking (for bye selection)
+    Rank every poule in one grouped pass over the poule MatchTable, on team IDs
+    only (no model objects; see get_qualified_teams_from_poules).
+    Returns: List of (team_id, poule_name, standings row, rank within poule) tuples
     """
     from utils.poules import get_poules_by_tournament
+    from utils.standings import MatchTable, compute_standings
     
-    qualified = []
-    poules = get_poules_by_tournament(tournament_id, MatchPhase.POULE.value)
+    poule_names = dict(get_poules_by_tournament(tournament_id, MatchPhase.POULE.value))
+    standings = compute_standings(MatchTable.load(tournament_id, MatchPhase.POULE.value))
     
-    for poule_id, poule_name in poules:
-        # Get teams in this poule from matches
-        all_matches = Match.get_by_tournament(tournament_id, MatchPhase.POULE)
-        poule_matches = [m for m in all_matches if m.poule_id == poule_id]
-        
-        # Get unique teams from matches
-        team_ids = set()
-        for match in poule_matches:
-            team_ids.add(match.team1.id)
-            team_ids.add(match.team2.id)
-        
-        teams = [Team.get_by_id(tid) for tid in team_ids if Team.get_by_id(tid)]
-        if not teams:
-            continue
-        
-        # Calculate standings for this poule
-        standings = calculate_poule_standings(teams, poule_matches)
-        
-        # Take top N teams from this poule
-        for i, (team, stats) in enumerate(standings[:top_n]):
-            qualified.append((team, poule_name, stats))
+    return [(int(row.team_id), poule_names[row.poule_id], row, int(row.rank))
+            for row in standings[standings['poule_id'].isin(list(poule_names))].itertuples()]
+
+
+def _with_teams(rankings: list) -> List[Tuple[Team, str, TeamStats, int]]:
+    """Load the Team of each ranking entry (one query for all of them); unknown teams are dropped"""
+    teams = {team.id: team for team in Team.get_by_ids([team_id for team_id, _, _, _ in rankings])}
+    return [(teams[team_id], poule, TeamStats.from_standings_row(teams[team_id], row), rank)
+            for team_id, poule, row, rank in rankings if team_id in teams]
+
+
+def get_qualified_teams_from_poules(tournament_id: int, top_n: int = 2,
+                                    rankings: Optional[list] = None) -> List[Tuple[Team, str, TeamStats]]:
+    """
+    Get top N teams from each poule (pass `rankings` from get_poule_rankings to reuse them).
+    Only the qualified teams are loaded as Team objects.
+    Returns: List of (Team, poule_name, TeamStats) tuples, sorted by ranking (for bye selection)
+    """
+    if rankings is None:
+        rankings = get_poule_rankings(tournament_id)
+    
+    qualified = [(team, poule, stats) for team, poule, stats, rank
+                 in _with_teams([entry for entry in rankings if entry[3] <= top_n])]
     
     # Sort all qualified teams by their stats for bye selection (best teams first)
     qualified.sort(key=lambda x: x[2], reverse=True)
@@ -119,169 +129,82 @@ def get_qualified_teams_from_poules(tournament_id: int, top_n: int = 2) -> List[
     return qualified
 
 
-def generate_knockout_bracket(tournament_id: int, qualified_teams: List[Tuple[Team, str, TeamStats]]):
+def get_eliminated_teams_from_poules(tournament_id: int, top_n: int = 2,
+                                     rankings: Optional[list] = None) -> List[Tuple[Team, str, TeamStats]]:
     """
-    Generate knockout bracket matches.
-    
-    Logic:
-    - 4 teams (2 poules): A1 vs B2, B1 vs A2
-    - 6 teams (3 poules): 2 best get bye, 4 others play quarterfinals
-    - 8 teams (4 poules): A1 vs D2, B1 vs C2, C1 vs B2, D1 vs A2
-    - 10+ teams: extra round(s) needed
-    
-    Returns: List of Match objects (not yet saved)
+    Get the teams that did not qualify from their poule (rank > top_n).
+    Only the eliminated teams are loaded as Team objects.
+    Returns: List of (Team, poule_name, TeamStats) tuples, best poule rank first, then by stats
     """
-    num_teams = len(qualified_teams)
+    if rankings is None:
+        rankings = get_poule_rankings(tournament_id)
     
-    if num_teams < 2:
-        return []
-    
-    matches = []
-    
-    # Group teams by poule
-    # qualified_teams is List[Tuple[Team, str, TeamStats]] - (team, poule_name, stats)
-    poule_groups: Dict[str, List[Tuple[Team, int]]] = {}  # poule_name -> [(team, rank_in_poule)]
-    # Track rank within each poule
-    poule_ranks: Dict[str, int] = defaultdict(int)
-    for team, poule_name, stats in qualified_teams:
-        if poule_name not in poule_groups:
-            poule_groups[poule_name] = []
-        # Track rank: first team from poule is rank 1, second is rank 2
-        poule_ranks[poule_name] += 1
-        rank = poule_ranks[poule_name]
-        poule_groups[poule_name].append((team, rank))
-    
-    # Track teams by poule (with their rank: 1st or 2nd in poule)
-    poule_teams: Dict[str, List[Team]] = defaultdict(list)
-    for team, poule_name, stats in qualified_teams:
-        poule_teams[poule_name].append(team)
-    
-    # Determine bracket structure
-    if num_teams == 4:
-        # 2 poules: A1 vs B2, B1 vs A2
-        poule_names = sorted(poule_teams.keys())
-        if len(poule_names) == 2:
-            a_teams = poule_teams[poule_names[0]]
-            b_teams = poule_teams[poule_names[1]]
-            if len(a_teams) >= 1 and len(b_teams) >= 2:
-                matches.append(Match(
-                    tournament_id=tournament_id,
-                    phase=MatchPhase.KNOCKOUT,
-                    team1=a_teams[0],  # A1
-                    team2=b_teams[1]   # B2
-                ))
-            if len(a_teams) >= 2 and len(b_teams) >= 1:
-                matches.append(Match(
-                    tournament_id=tournament_id,
-                    phase=MatchPhase.KNOCKOUT,
-                    team1=b_teams[0],  # B1
-                    team2=a_teams[1]   # A2
-                ))
-        else:
-            # Fallback: first vs last, second vs second-last
-            matches.append(Match(
-                tournament_id=tournament_id,
-                phase=MatchPhase.KNOCKOUT,
-                team1=qualified_teams[0][0],
-                team2=qualified_teams[3][0]
-            ))
-            matches.append(Match(
-                tournament_id=tournament_id,
-                phase=MatchPhase.KNOCKOUT,
-                team1=qualified_teams[1][0],
-                team2=qualified_teams[2][0]
-            ))
+    eliminated = _with_teams([entry for entry in rankings if entry[3] > top_n])
+    eliminated.sort(key=lambda x: (-x[3], x[2].ranking_key), reverse=True)
     
-    elif num_teams == 6:
-        # 3 poules: 2 best overall get bye, 4 others play quarterfinals
-        # Teams are already sorted by stats, so first 2 get bye
-        # Remaining 4 play: 3 vs 6, 4 vs 5
-        matches.append(Match(
-            tournament_id=tournament_id,
-            phase=MatchPhase.KNOCKOUT,
-            team1=qualified_teams[2][0],  # 3rd best overall
-            team2=qualified_teams[5][0]   # 6th best overall
-        ))
-        matches.append(Match(
-            tournament_id=tournament_id,
-            phase=MatchPhase.KNOCKOUT,
-            team1=qualified_teams[3][0],  # 4th best overall
-            team2=qualified_teams[4][0]   # 5th best overall
-        ))
-    
-    elif num_teams == 8:
-        # 4 poules: A1 vs D2, B1 vs C2, C1 vs B2, D1 vs A2
-        poule_names = sorted(poule_teams.keys())
-        if len(poule_names) == 4:
-            teams_by_poule = [poule_teams[pn] for pn in poule_names]
-            # A vs D
-            matches.append(Match(
-                tournament_id=tournament_id,
-                phase=MatchPhase.KNOCKOUT,
-                team1=teams_by_poule[0][0],  # A1
-                team2=teams_by_poule[3][1] if len(teams_by_poule[3]) > 1 else teams_by_poule[3][0]  # D2
-            ))
-            matches.append(Match(
-                tournament_id=tournament_id,
-                phase=MatchPhase.KNOCKOUT,
-                team1=teams_by_poule[3][0],  # D1
-                team2=teams_by_poule[0][1] if len(teams_by_poule[0]) > 1 else teams_by_poule[0][0]  # A2
-            ))
-            # B vs C
-            matches.append(Match(
-                tournament_id=tournament_id,
-                phase=MatchPhase.KNOCKOUT,
-                team1=teams_by_poule[1][0],  # B1
-                team2=teams_by_poule[2][1] if len(teams_by_poule[2]) > 1 else teams_by_poule[2][0]  # C2
-            ))
-            matches.append(Match(
-                tournament_id=tournament_id,
-                phase=MatchPhase.KNOCKOUT,
-                team1=teams_by_poule[2][0],  # C1
-                team2=teams_by_poule[1][1] if len(teams_by_poule[1]) > 1 else teams_by_poule[1][0]  # B2
-            ))
-        else:
-            # Fallback: standard pairing
-            for i in range(4):
-                matches.append(Match(
-                    tournament_id=tournament_id,
-                    phase=MatchPhase.KNOCKOUT,
-                    team1=qualified_teams[i][0],
-                    team2=qualified_teams[7-i][0]
-                ))
-    
-    else:
-        # For other numbers, create first round (will need more rounds later)
-        # Pair teams: first vs last, second vs second-last, etc.
-        for i in range(num_teams // 2):
-            matches.append(Match(
-                tournament_id=tournament_id,
-                phase=MatchPhase.KNOCKOUT,
-                team1=qualified_teams[i][0],
-                team2=qualified_teams[num_teams - 1 - i][0]
-            ))
-    
-    return matches
+    return [(team, poule, stats) for team, poule, stats, _ in eliminated]
 
 
-def generate_knockout_round(tournament_id: int, previous_round_winners: List[Team], round_name: str):
+def seed_positions(bracket_size: int) -> List[int]:
     """
-    Generate next round of knockout bracket from previous round winners.
+    Standard seeding order of a bracket (bracket_size is a power of two).
+    Returns the seed (1-based) for every slot, e.g. 8 -> [1, 8, 4, 5, 2, 7, 3, 6]:
+    seeds 1 and 2 can only meet in the final, seed k plays seed size+1-k first.
     """
-    num_teams = len(previous_round_winners)
-    
+    positions = [1]
+    while len(positions) < bracket_size:
+        total = 2 * len(positions) + 1
+        positions = [seed for position in positions for seed in (position, total - position)]
+    return positions
+
+
+def seed_bracket(qualified_teams: List[Tuple[Team, str, TeamStats]]) -> List[Optional[Tuple[Team, str, TeamStats]]]:
+    """
+    Place the qualified teams (best first) into the slots of a seeded bracket.
+    The bracket is padded to the next power of two; the missing opponents are
+    byes (None) and go to the top seeds. Teams from the same poule are kept
+    apart in the first round by swapping the lower seed with the nearest
+    lower seed of another pairing (entries without a poule are never moved).
+    O(N log N) for N teams from poules of bounded size (top N per poule).
+    Returns the slots; slots 2i and 2i+1 meet in the first round.
+    """
+    num_teams = len(qualified_teams)
     if num_teams < 2:
-        return []
+        return list(qualified_teams)
     
-    matches = []
-    # Pair teams: first vs last, second vs second-last, etc.
-    for i in range(num_teams // 2):
-        matches.append(Match(
-            tournament_id=tournament_id,
-            phase=MatchPhase.KNOCKOUT,
-            team1=previous_round_winners[i],
-            team2=previous_round_winners[num_teams - 1 - i]
-        ))
+    bracket_size = 1 << (num_teams - 1).bit_length()
+    slots = [qualified_teams[seed - 1] if seed <= num_teams else None
+             for seed in seed_positions(bracket_size)]
     
-    return matches
-
+    # Same-poule separation in the first round
+    pairs = bracket_size // 2
+    
+    def poule(slot: int) -> Optional[str]:
+        return slots[slot][1] if slots[slot] else None
+    
+    # Pairings whose low seed can be moved (a team with a poule); swaps keep this set unchanged
+    movable = [pair for pair in range(pairs) if poule(2 * pair + 1) is not None]
+    
+    # Lower seed of every pairing sits in the odd slot (standard seeding)
+    for pair in range(pairs):
+        high, low = 2 * pair, 2 * pair + 1
+        if slots[low] is None or poule(low) is None or poule(high) != poule(low):
+            continue
+        conflict = poule(low)
+        # Nearest movable pairing without a team of this poule (the lower pairing on a tie).
+        # Walking outward from the bisect position only skips pairings of this poule,
+        # so each conflict costs O(log N + poule size).
+        right = bisect_right(movable, pair)
+        left = right - 1
+        while left >= 0 or right < len(movable):
+            if right >= len(movable) or (left >= 0 and pair - movable[left] <= movable[right] - pair):
+                other = movable[left]
+                left -= 1
+            else:
+                other = movable[right]
+                right += 1
+            if other != pair and poule(2 * other) != conflict and poule(2 * other + 1) != conflict:
+                slots[low], slots[2 * other + 1] = slots[2 * other + 1], slots[low]
+                break
+    
+    return slots
@@ -3,7 +3,8 @@ Poule management utilities
 """
 import sqlite3
 from typing import Optional, List, Tuple
-from database import get_connection
+from database import get_connection, mark_changed
+from cache import cached, invalidate
 
 
 def create_poule(tournament_id: int, phase: str, name: str) -> int:
@@ -17,6 +18,7 @@ def create_poule(tournament_id: int, phase: str, name: str) -> int:
     poule_id = c.lastrowid
     conn.commit()
     conn.close()
+    invalidate(tournament_id)
     return poule_id
 
 
@@ -41,8 +43,45 @@ def get_or_create_poule(tournament_id: int, phase: str, name: str) -> int:
     return create_poule(tournament_id, phase, name)
 
 
+def get_or_create_poules(tournament_id: int, phase: str, names: List[str],
+                         conn: Optional[sqlite3.Connection] = None) -> List[int]:
+    """
+    Get or create many poules at once, returns their IDs in the order of `names`.
+    Pass `conn` to join a transaction opened with database.transaction().
+    """
+    if not names:
+        return []
+    
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    else:
+        mark_changed(conn, tournament_id)
+    c = conn.cursor()
+    c.executemany('''
+        INSERT OR IGNORE INTO poules (tournament_id, phase, name)
+        VALUES (?, ?, ?)
+    ''', [(tournament_id, phase, name) for name in names])
+    c.execute('''
+        SELECT id, name FROM poules
+        WHERE tournament_id = ? AND phase = ?
+    ''', (tournament_id, phase))
+    ids_by_name = {name: poule_id for poule_id, name in c.fetchall()}
+    if own_conn:
+        conn.commit()
+        conn.close()
+        invalidate(tournament_id)
+    return [ids_by_name[name] for name in names]
+
+
 def get_poules_by_tournament(tournament_id: int, phase: Optional[str] = None) -> List[Tuple]:
     """Get all poules for a tournament, optionally filtered by phase"""
+    return list(_fetch_poules(tournament_id, phase))
+
+
+@cached
+def _fetch_poules(tournament_id: int, phase: Optional[str]) -> tuple:
+    """(id, name) rows of the poules of a tournament, ordered by name"""
     conn = get_connection()
     c = conn.cursor()
     
@@ -59,7 +98,7 @@ def get_poules_by_tournament(tournament_id: int, phase: Optional[str] = None) ->
             ORDER BY name
         ''', (tournament_id,))
     
-    rows = c.fetchall()
+    rows = tuple(c.fetchall())
     conn.close()
     return rows
 
@@ -0,0 +1,104 @@
+"""
+Bulk score entry - match results as rows of an editable grid and back
+"""
+from __future__ import annotations
+
+from typing import List, Optional, Tuple, TYPE_CHECKING
+from models.match import Match
+
+# pandas is imported on first use (the grid is only shown in the "Raster" match view)
+if TYPE_CHECKING:
+    import pandas as pd
+
+MAX_SETS = 7  # Maximum sets for a match
+
+SET_COLUMNS = [f"Set {i + 1}" for i in range(MAX_SETS)]
+
+
+def results_frame(matches: List[Match], with_sets: bool) -> pd.DataFrame:
+    """
+    One grid row per match: set scores as text ("11-9") for table tennis,
+    otherwise the number of sets won by each team
+    """
+    import pandas as pd
+    
+    rows = []
+    for match in matches:
+        row = {'ID': match.id, 'Team 1': match.team1.display_name, 'Team 2': match.team2.display_name}
+        if with_sets:
+            for i, column in enumerate(SET_COLUMNS):
+                row[column] = f"{match.sets[i][0]}-{match.sets[i][1]}" if i < len(match.sets) else ""
+        else:
+            row['Score 1'] = match.team1_score
+            row['Score 2'] = match.team2_score
+        rows.append(row)
+    
+    frame = pd.DataFrame(rows, columns=['ID', 'Team 1', 'Team 2'] + (SET_COLUMNS if with_sets else ['Score 1', 'Score 2']))
+    if not with_sets:
+        frame = frame.astype({'Score 1': 'Int64', 'Score 2': 'Int64'})
+    return frame
+
+
+def parse_set(text: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Parse a set score like "11-9" (empty or 0-0 = no set)"""
+    import pandas as pd
+    
+    if text is None or pd.isna(text) or not str(text).strip():
+        return None
+    parts = str(text).replace(" ", "").split("-")
+    if len(parts) != 2 or not all(part.isdigit() for part in parts):
+        raise ValueError(f"Ongeldige set '{text}' (gebruik bijv. 11-9)")
+    score = (int(parts[0]), int(parts[1]))
+    return score if score != (0, 0) else None
+
+
+def apply_results(matches: List[Match], edited: pd.DataFrame, with_sets: bool) -> Tuple[List[Match], List[str]]:
+    """
+    Copy the edited grid rows onto their matches.
+    Returns the changed matches and the validation errors; when there are
+    errors no match is changed.
+    """
+    import pandas as pd
+    
+    by_id = {match.id: match for match in matches}
+    updates = []
+    errors = []
+    
+    for row in edited.to_dict('records'):
+        match = by_id.get(row['ID'])
+        if match is None:
+            continue
+        label = f"{match.team1.display_name} vs {match.team2.display_name}"
+        
+        if with_sets:
+            try:
+                sets = [score for score in (parse_set(row[column]) for column in SET_COLUMNS) if score]
+            except ValueError as e:
+                errors.append(f"{label}: {e}")
+                continue
+            if sets != match.sets:
+                updates.append((match, sets, None, None))
+        else:
+            score1, score2 = row['Score 1'], row['Score 2']
+            if pd.isna(score1) and pd.isna(score2):
+                score1 = score2 = None
+            elif pd.isna(score1) or pd.isna(score2):
+                errors.append(f"{label}: vul beide scores in")
+                continue
+            elif score1 < 0 or score2 < 0:
+                errors.append(f"{label}: scores kunnen niet negatief zijn")
+                continue
+            else:
+                score1, score2 = int(score1), int(score2)
+            if match.sets or (score1, score2) != (match.team1_score, match.team2_score):
+                updates.append((match, [], score1, score2))
+    
+    if errors:
+        return [], errors
+    
+    for match, sets, score1, score2 in updates:
+        match.sets = sets
+        # Set wins are derived from the sets on save; no sets = cleared result
+        match.team1_score = score1
+        match.team2_score = score2
+    return [update[0] for update in updates], []
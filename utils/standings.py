@@ -0,0 +1,204 @@
+"""
+Standings engine - the one columnar implementation of the win/loss/sets
+aggregation and ranking shared by all tournament types
+"""
+from typing import Optional, Iterable
+
+import numpy as np
+import pandas as pd
+
+from database import get_connection
+from cache import cached
+
+STAT_COLUMNS = ['played', 'wins', 'losses', 'draws', 'sets_won', 'sets_lost']
+
+# Ranking within a poule: 1. Wins, 2. Sets balance, 3. Sets won (team_id keeps ties stable)
+RANKING_KEYS = ['wins', 'set_balance', 'sets_won']
+
+# One MatchTable row per match; scores are 0 (and played False) for unplayed matches,
+# points are the summed set scores
+MATCH_DTYPE = np.dtype([
+    ('match_id', np.int64), ('poule_id', np.int64), ('team1_id', np.int64), ('team2_id', np.int64),
+    ('team1_score', np.int64), ('team2_score', np.int64), ('points1', np.int64), ('points2', np.int64),
+    ('played', np.bool_),
+])
+
+
+class MatchTable:
+    """
+    The matches of a tournament phase as a NumPy structured array (MATCH_DTYPE),
+    the input of the standings engine - no Match, Team or Player objects needed
+    """
+    
+    __slots__ = ('rows',)
+    
+    def __init__(self, rows: np.ndarray):
+        self.rows = rows
+    
+    @staticmethod
+    def load(tournament_id: int, phase: str = "poule") -> 'MatchTable':
+        """Load the matches of a tournament phase straight from the database (one query)"""
+        return MatchTable(_fetch_match_table(tournament_id, phase))
+    
+    @staticmethod
+    def from_matches(matches: Iterable) -> 'MatchTable':
+        """Build a match table from Match objects"""
+        rows = []
+        for m in matches:
+            # Sets won come from the sets when there are any (unsaved matches have no scores yet)
+            if m.sets:
+                score1, score2 = m.set_wins
+            elif m.is_played:
+                score1, score2 = m.team1_score, m.team2_score
+            else:
+                score1 = score2 = 0
+            rows.append((m.id or 0, m.poule_id or 0, m.team1.id, m.team2.id, score1, score2,
+                         sum(s[0] for s in m.sets), sum(s[1] for s in m.sets), m.is_played))
+        return MatchTable(np.array(rows, dtype=MATCH_DTYPE))
+    
+    def for_poule(self, poule_id: int) -> 'MatchTable':
+        """The matches of one poule"""
+        return MatchTable(self.rows[self.rows['poule_id'] == poule_id])
+    
+    def in_one_poule(self) -> 'MatchTable':
+        """The same matches, all in poule 0"""
+        rows = self.rows.copy()
+        rows['poule_id'] = 0
+        return MatchTable(rows)
+    
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.rows[column]
+    
+    def __len__(self):
+        return len(self.rows)
+    
+    def __repr__(self):
+        return f"MatchTable({len(self.rows)} matches)"
+
+
+@cached
+def _fetch_match_table(tournament_id: int, phase: str) -> np.ndarray:
+    """MATCH_DTYPE rows of a tournament phase (read-only, the array is shared through the cache)"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('''
+        SELECT m.id, COALESCE(m.poule_id, 0), m.team1_id, m.team2_id, m.team1_score, m.team2_score,
+               COALESCE(SUM(s.score1), 0), COALESCE(SUM(s.score2), 0)
+        FROM matches m
+        LEFT JOIN match_sets s ON s.match_id = m.id
+        WHERE m.tournament_id = ? AND m.phase = ?
+        GROUP BY m.id
+    ''', (tournament_id, phase))
+    rows = c.fetchall()
+    conn.close()
+    
+    played = [row[4] is not None and row[5] is not None for row in rows]
+    table = np.array(
+        [(row[0], row[1], row[2], row[3], row[4] if is_played else 0, row[5] if is_played else 0,
+          row[6], row[7], is_played)
+         for row, is_played in zip(rows, played)],
+        dtype=MATCH_DTYPE
+    )
+    table.flags.writeable = False
+    return table
+
+
+def compute_standings(matches: MatchTable, team_ids: Optional[Iterable[int]] = None,
+                      poule_id: int = 0) -> pd.DataFrame:
+    """
+    Compute the standings of every poule in one grouped pass over a match table.
+    Every team that appears in a match of a poule gets a row, played or not;
+    `team_ids` adds teams without matches (to `poule_id`, 0 = no poule).
+    Returns ranked rows: poule_id, team_id, STAT_COLUMNS, points_for,
+    points_against, set_balance, rank.
+    """
+    poules = matches['poule_id']
+    played = matches['played']
+    
+    # One entry per (match, team): team1's view followed by team2's view
+    group_poules = np.concatenate([poules, poules])
+    group_teams = np.concatenate([matches['team1_id'], matches['team2_id']])
+    own = np.concatenate([matches['team1_score'], matches['team2_score']])
+    other = np.concatenate([matches['team2_score'], matches['team1_score']])
+    points_own = np.concatenate([matches['points1'], matches['points2']])
+    points_other = np.concatenate([matches['points2'], matches['points1']])
+    counted = np.concatenate([played, played])
+    if team_ids is not None:
+        extra = np.fromiter(team_ids, dtype=np.int64)
+        group_poules = np.concatenate([group_poules, np.full(len(extra), poule_id, dtype=np.int64)])
+        group_teams = np.concatenate([group_teams, extra])
+        own, other, points_own, points_other, counted = (
+            np.concatenate([a, np.zeros(len(extra), dtype=a.dtype)])
+            for a in (own, other, points_own, points_other, counted))
+    
+    # Group on (poule_id, team_id) - packed into one integer key - and sum with bincount
+    stride = int(group_teams.max(initial=0)) + 1
+    keys, group = np.unique(group_poules * stride + group_teams, return_inverse=True)
+    size = len(keys)
+    
+    def total(values: np.ndarray) -> np.ndarray:
+        return np.bincount(group, weights=values, minlength=size).astype(np.int64)
+    
+    standings = pd.DataFrame({
+        'poule_id': keys // stride,
+        'team_id': keys % stride,
+        'played': total(counted),
+        'wins': total(counted & (own > other)),
+        'losses': total(counted & (own < other)),
+        'draws': total(counted & (own == other)),
+        'sets_won': total(own),
+        'sets_lost': total(other),
+        'points_for': total(points_own),
+        'points_against': total(points_other),
+    })
+    return rank_standings(standings)
+
+
+def rank_standings(standings: pd.DataFrame) -> pd.DataFrame:
+    """Sort standings rows by poule and ranking keys and number them per poule"""
+    standings = standings.assign(set_balance=standings['sets_won'] - standings['sets_lost'])
+    if 'poule_id' not in standings.columns:
+        standings['poule_id'] = 0
+    
+    # lexsort: last key is the primary one; negate the keys ranked high-to-low
+    poules = standings['poule_id'].to_numpy(np.int64)
+    order = np.lexsort([standings['team_id'].to_numpy(np.int64)]
+                       + [-standings[key].to_numpy(np.int64) for key in reversed(RANKING_KEYS)]
+                       + [poules])
+    standings = standings.iloc[order].reset_index(drop=True)
+    
+    # Rank = position within the poule
+    poules = poules[order]
+    starts = np.flatnonzero(np.r_[True, poules[1:] != poules[:-1]])
+    positions = np.arange(len(poules))
+    standings['rank'] = positions - np.repeat(starts, np.diff(np.r_[starts, len(poules)])) + 1
+    return standings
+
+
+def standings_frame(standings: pd.DataFrame, with_poule: bool = False,
+                    with_draws: bool = False) -> pd.DataFrame:
+    """
+    Turn ranked standings (with team_name and, for poules, poule_name columns)
+    into the DataFrame the app renders, numbered from 1.
+    """
+    if standings.empty:
+        return pd.DataFrame()
+    
+    if with_poule:
+        standings = standings.sort_values('poule_name', kind='stable')
+    columns = {'team_name': 'Team', 'wins': 'Gewonnen', 'losses': 'Verloren'}
+    if with_poule:
+        columns = {'poule_name': 'Poule', **columns}
+    if with_draws:
+        columns['draws'] = 'Gelijk'
+    columns.update({'sets_won': 'Punten Voor', 'sets_lost': 'Punten Tegen', 'set_balance': 'Saldo'})
+    
+    df = standings[list(columns)].rename(columns=columns)
+    df.reset_index(drop=True, inplace=True)
+    df.index = df.index + 1
+    return df
+
+
+def ranking_key(wins: int, sets_won: int, sets_lost: int) -> tuple:
+    """Ranking key of one team (higher is better), consistent with RANKING_KEYS"""
+    return (wins, sets_won - sets_lost, sets_won)